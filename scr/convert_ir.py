@@ -1,12 +1,18 @@
 import imageio.v2 as imageio
 import numpy as np
 
-image_16bit = imageio.imread("ir.tif")
 
-image_min = np.min(image_16bit)
-image_range = np.ptp(image_16bit)  # <- updated!
-image_8bit = ((image_16bit - image_min) / image_range * 255).astype(np.uint8)
+def main():
+    image_16bit = imageio.imread("ir.tif")
 
-imageio.imwrite("ir_8bit.tif", image_8bit)
+    image_min = np.min(image_16bit)
+    image_range = np.ptp(image_16bit)  # <- updated!
+    image_8bit = ((image_16bit - image_min) / image_range * 255).astype(np.uint8)
 
-print("converted")
+    imageio.imwrite("ir_8bit.tif", image_8bit)
+
+    print("converted")
+
+
+if __name__ == "__main__":
+    main()
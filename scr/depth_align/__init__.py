@@ -0,0 +1,34 @@
+"""
+Depth-aware RGB and IR image alignment using ToF-based homography interpolation.
+
+Importing the package only pulls in numpy; PIL, scipy, OpenCV and matplotlib
+are imported by the functions that use them.
+"""
+from .aligner import Aligner
+from .homography import IR_COEFFS, RGB_COEFFS, get_H, read_linear_model
+from .loader import Frame, FrameLoader, load_frame
+from .pipeline import align_frame, run, run_sequence
+from .register import register_to_tof
+from .roi import ROI, align_roi
+from .sink import SequenceReader, SequenceWriter
+
+__version__ = "0.1.0"
+
+__all__ = [
+    "Aligner",
+    "Frame",
+    "FrameLoader",
+    "IR_COEFFS",
+    "RGB_COEFFS",
+    "ROI",
+    "SequenceReader",
+    "SequenceWriter",
+    "align_frame",
+    "align_roi",
+    "get_H",
+    "load_frame",
+    "read_linear_model",
+    "register_to_tof",
+    "run",
+    "run_sequence",
+]
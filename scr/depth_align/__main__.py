@@ -0,0 +1,3 @@
+from .cli import pipeline_main
+
+pipeline_main()
@@ -0,0 +1,209 @@
+"""
+Reusable aligner with preallocated work buffers.
+
+align_frame allocates every intermediate array for each frame. An Aligner is
+configured once with sensor sizes and calibration. Each call writes into a
+buffer set: the depth map, the interpolation output, the pixel mapping, the
+warped IR image, its mask and the distance-transform index arrays used for
+hole filling. In steady state the per-frame path only allocates the
+temporaries of the NumPy projection. The Numba backend projects straight into
+the buffers.
+
+An Aligner holds no per-call state, so align() is reentrant. Threads can call
+it concurrently as long as each uses its own buffer set, either created with
+buffers() or borrowed from the pool with acquire(). Concurrent calls with the
+Numba backend need a thread-safe Numba threading layer (tbb or omp).
+"""
+from contextlib import contextmanager
+import queue
+
+import numpy as np
+
+from .depth import fill_nearest, reject_outliers
+from .homography import IR_COEFFS, RGB_COEFFS
+from .online import current_coeffs
+from .pipeline import IR_SIZE, RGB_SIZE, TOF_SIZE, Alignment, _kernels, fill_holes, resolve_backend
+from .sparse import interpolate_sparse, project_points, valid_pixel_index
+
+
+class AlignBuffers:
+    """One set of work buffers for Aligner.align; not shared between concurrent calls."""
+
+    def __init__(self, tof_size=TOF_SIZE, rgb_shape=RGB_SIZE[::-1], ir_dtype=np.uint8, dtype=np.float64):
+        width, height = tof_size
+        n = width * height
+        self.z_map = np.empty((height, width), dtype=dtype)
+        self.z_filled = np.empty((height, width), dtype=dtype)
+        self.mapping = np.empty((n, 7))
+        self.ir_xy = np.empty((n, 2), dtype=np.int64)
+        self.rgb_xy = np.empty((n, 2), dtype=np.int64)
+        # Distance-transform indices for hole filling in depth
+        self.depth_indices = np.empty((2, height, width), dtype=np.int32)
+        self.set_warp_shape(rgb_shape, ir_dtype)
+
+        self.width = width
+        self.set_dense_rows()
+
+    def set_warp_shape(self, rgb_shape, ir_dtype):
+        """(Re)allocates the warped IR, its mask and their hole-filling indices for an RGB image shape."""
+        rgb_h, rgb_w = rgb_shape[:2]
+        self.warped_ir = np.empty((rgb_h, rgb_w), dtype=ir_dtype)
+        self.mask = np.empty((rgb_h, rgb_w), dtype=bool)
+        self.warp_indices = np.empty((2, rgb_h, rgb_w), dtype=np.int32)
+
+    def set_dense_rows(self):
+        """Writes the row and col columns of the dense mapping, which never change between frames."""
+        rows, cols = np.divmod(np.arange(len(self.mapping)), self.width)
+        self.mapping[:, 0] = rows + 1
+        self.mapping[:, 1] = cols + 1
+        self.dense_rows = True
+
+
+class Aligner:
+    """
+    Depth-aware IR to RGB alignment with fixed sensor sizes and calibration.
+
+    The models may be coefficient dicts or OnlineCalibration instances, which
+    are read again on every call (see pipeline.align_stream). dtype selects
+    the precision of the depth, interpolation and projection stages.
+
+    rgb_size is the calibrated extent that RGB coordinates are clipped to;
+    the warped IR takes the shape of the RGB image passed to align(), or
+    rgb_shape (rows, cols) when none is passed. ir_dtype is the expected IR
+    dtype; buffers are reallocated when a frame's RGB shape or IR dtype
+    differs from theirs.
+    """
+
+    def __init__(self, ir_model=IR_COEFFS, rgb_model=RGB_COEFFS, tof_size=TOF_SIZE, ir_size=IR_SIZE,
+                 rgb_size=RGB_SIZE, sparse=False, spatial_sigma=1.0, depth_sigma=0.05,
+                 ir_inverse=None, rgb_inverse=None, backend="auto", ir_dtype=np.uint8, pool_size=2,
+                 dtype=np.float64, rgb_shape=None):
+        self.ir_model = ir_model
+        self.rgb_model = rgb_model
+        self.tof_size = tuple(tof_size)
+        self.ir_size = tuple(ir_size)
+        self.rgb_size = tuple(rgb_size)
+        self.rgb_shape = self.rgb_size[::-1] if rgb_shape is None else tuple(rgb_shape[:2])
+        self.sparse = sparse
+        self.spatial_sigma = spatial_sigma
+        self.depth_sigma = depth_sigma
+        self.ir_inverse = ir_inverse
+        self.rgb_inverse = rgb_inverse
+        self.backend = resolve_backend(backend)
+        self.ir_dtype = np.dtype(ir_dtype)
+        self.dtype = np.dtype(dtype)
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(self.buffers())
+
+    def buffers(self):
+        """Allocates a new buffer set for this aligner's sizes."""
+        return AlignBuffers(self.tof_size, self.rgb_shape, self.ir_dtype, self.dtype)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrows a buffer set from the pool, allocating one if all are in use.
+
+        The results of align() are views into the buffers, so use them before
+        the with block ends.
+        """
+        try:
+            buffers = self._pool.get_nowait()
+        except queue.Empty:
+            buffers = self.buffers()
+        try:
+            yield buffers
+        finally:
+            self._pool.put(buffers)
+
+    def align(self, depth, ir, rgb=None, out=None):
+        """
+        Aligns one frame.
+
+        Args:
+            depth: (H, W) ToF depth in mm
+            ir: IR image of ir_size
+            rgb: RGB image; only its shape is used, to size the warped IR
+            out: AlignBuffers to write into; a new set is allocated if omitted
+
+        Returns:
+            Alignment whose arrays are views into `out`
+        """
+        width, height = self.tof_size
+        if depth.shape != (height, width):
+            raise ValueError(f"depth has shape {depth.shape}, expected {(height, width)}")
+        if ir.shape[:2] != self.ir_size[::-1]:
+            raise ValueError(f"IR image has shape {ir.shape}, expected {self.ir_size[::-1]}")
+        buf = self.buffers() if out is None else out
+        rgb_shape = self.rgb_shape if rgb is None else rgb.shape[:2]
+        if buf.warped_ir.shape != rgb_shape or buf.warped_ir.dtype != ir.dtype:
+            buf.set_warp_shape(rgb_shape, ir.dtype)
+
+        z_filled = self._interpolate(depth, buf)
+        mapping, ir_xy, rgb_xy = self._map(z_filled, buf)
+        warped_ir, mask = self._warp(ir_xy, rgb_xy, ir, buf)
+        return Alignment(z_filled, mapping, warped_ir, mask, len(mapping) / z_filled.size)
+
+    def _interpolate(self, depth, buf):
+        np.copyto(buf.z_map, depth)
+        z_map = reject_outliers(buf.z_map)
+        if self.sparse:
+            index = valid_pixel_index(z_map)
+            values = interpolate_sparse(z_map, index, self.spatial_sigma, self.depth_sigma)
+            buf.z_filled.fill(np.nan)
+            buf.z_filled.ravel()[index] = values
+            return buf.z_filled
+        interpolate = _kernels(self.backend)[0]
+        interpolate(z_map, spatial_sigma=self.spatial_sigma, depth_sigma=self.depth_sigma, out=buf.z_filled)
+        return fill_nearest(buf.z_filled, buf.depth_indices)
+
+    def _map(self, z_filled, buf):
+        ir_coeffs = current_coeffs(self.ir_model)
+        rgb_coeffs = current_coeffs(self.rgb_model)
+        if self.sparse:
+            index = valid_pixel_index(z_filled)
+            n = len(index)
+            mapping = buf.mapping[:n]
+            rows, cols = np.divmod(index, self.tof_size[0])
+            mapping[:, 0] = rows + 1
+            mapping[:, 1] = cols + 1
+            mapping[:, 2] = z_filled.ravel()[index]
+            buf.dense_rows = False
+        else:
+            n = z_filled.size
+            mapping = buf.mapping
+            if not buf.dense_rows:
+                buf.set_dense_rows()
+            mapping[:, 2] = z_filled.ravel()
+        ir_xy, rgb_xy = buf.ir_xy[:n], buf.rgb_xy[:n]
+
+        no_inverse = self.ir_inverse is None and self.rgb_inverse is None
+        if self.backend == "numba" and not self.sparse and no_inverse:
+            from . import jit
+
+            jit.project(z_filled, ir_coeffs, self.ir_size, ir_xy)
+            jit.project(z_filled, rgb_coeffs, self.rgb_size, rgb_xy)
+        else:
+            rows, cols, z = mapping[:, 0], mapping[:, 1], mapping[:, 2]
+            d_cm = -z / 10.0
+            ir_xy[:] = project_points(ir_coeffs, d_cm, rows, cols, *self.ir_size, inverse=self.ir_inverse,
+                                      dtype=self.dtype)
+            rgb_xy[:] = project_points(rgb_coeffs, d_cm, rows, cols, *self.rgb_size, inverse=self.rgb_inverse,
+                                       dtype=self.dtype)
+        mapping[:, 3:5] = ir_xy
+        mapping[:, 5:7] = rgb_xy
+        return mapping, ir_xy, rgb_xy
+
+    def _warp(self, ir_xy, rgb_xy, ir, buf):
+        buf.warped_ir.fill(0)
+        buf.mask.fill(False)
+        if self.backend == "numba":
+            from . import jit
+
+            jit.splat(ir_xy, rgb_xy, ir, self.ir_size, buf.warped_ir, buf.mask)
+        else:
+            # Coordinates are clipped to both images, so every point lands
+            buf.warped_ir[rgb_xy[:, 1], rgb_xy[:, 0]] = ir[ir_xy[:, 1], ir_xy[:, 0]]
+            buf.mask[rgb_xy[:, 1], rgb_xy[:, 0]] = True
+        return fill_holes(buf.warped_ir, buf.mask, buf.warp_indices), buf.mask
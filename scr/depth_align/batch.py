@@ -0,0 +1,199 @@
+"""
+Resumable batch processing of many capture folders.
+
+Every pipeline stage stores its result in a content-addressed artifact cache.
+The key of a stage hashes the keys of its inputs and its own parameters:
+
+    depth    <- blaze.ply contents
+    interp   <- depth, sparse, sigmas, backend, outlier filter, precision
+    mapping  <- interp, homography models, sensor sizes, backend
+    warp     <- mapping, ir.tif contents, rgb.tif shape
+
+An interrupted or repeated run therefore resumes at the first stage whose
+artifact is missing. Output export (text tables, PNGs, figures) is not
+cached, so changing only those options reuses every stage.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from . import pipeline
+from .homography import IR_COEFFS, RGB_COEFFS
+from .loader import IR_NAME, PLY_NAME, RGB_NAME, read_image_shape, read_ir, read_ply_depth, read_rgb
+
+# Default cache location, relative to the working directory
+CACHE_DIR = ".depth_align_cache"
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_key(stage, *parts):
+    """Derives an artifact key from a stage name and JSON-serializable inputs."""
+    payload = json.dumps([stage, *parts], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Directory of .npz artifacts addressed by stage key.
+
+    Artifacts are written to a temporary file and renamed into place, so an
+    interrupted write never leaves a partial artifact behind; unreadable
+    artifacts are discarded and recomputed.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+
+    def path(self, stage, key):
+        return os.path.join(self.root, stage, key[:2], key + ".npz")
+
+    def get(self, stage, key):
+        """Returns the stored arrays as a dict, or None if missing or unreadable."""
+        path = self.path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            os.remove(path)
+            return None
+
+    def put(self, stage, key, **arrays):
+        """Stores arrays under the key and returns them."""
+        path = self.path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return arrays
+
+    def fetch(self, stage, key, compute):
+        """Returns the cached artifact, computing and storing it if needed."""
+        cached = self.get(stage, key)
+        if cached is not None:
+            return cached, True
+        return self.put(stage, key, **compute()), False
+
+
+def read_manifest(file_path):
+    """
+    Reads capture folders from a manifest, one per line.
+
+    Blank lines and lines starting with '#' are ignored; relative paths are
+    resolved against the manifest's folder.
+    """
+    base = os.path.dirname(os.path.abspath(file_path))
+    with open(file_path, "r") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [os.path.normpath(os.path.join(base, line)) for line in lines]
+
+
+def output_name(folder):
+    """Turns a capture folder into a flat output folder name."""
+    rel = os.path.relpath(os.path.abspath(folder))
+    if rel.startswith(os.pardir):
+        rel = os.path.abspath(folder).lstrip(os.sep)
+    return rel.replace(os.sep, "_")
+
+
+def process_capture(folder, cache_root=CACHE_DIR, output_dir=".", sparse=False, backend="auto",
+                    ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS, ir_inverse=None, rgb_inverse=None,
+                    save_text=True, png=False, figure=False, spatial_sigma=1.0, depth_sigma=0.05, outliers="histogram",
+                    dtype=np.float64):
+    """
+    Runs the pipeline on one capture folder, reusing cached stage artifacts.
+
+    Returns:
+        dict with the folder, output directory and the stages that were computed
+    """
+    cache = ArtifactCache(cache_root)
+    computed = []
+    backend = pipeline.resolve_backend(backend)
+    precision = np.dtype(dtype).name
+
+    def fetch(stage, key, compute):
+        artifact, hit = cache.fetch(stage, key, compute)
+        if not hit:
+            computed.append(stage)
+        return artifact
+
+    ply_path = os.path.join(folder, PLY_NAME)
+    ir_path = os.path.join(folder, IR_NAME)
+    rgb_path = os.path.join(folder, RGB_NAME)
+
+    depth_key = stage_key("depth", file_digest(ply_path), pipeline.TOF_SIZE)
+    depth = fetch("depth", depth_key, lambda: {"depth": read_ply_depth(ply_path, *pipeline.TOF_SIZE)})["depth"]
+
+    interp_key = stage_key("interp", depth_key, sparse, spatial_sigma, depth_sigma, backend, outliers, precision)
+    z_filled = fetch("interp", interp_key, lambda: {
+        "z_filled": pipeline.interpolate_depth(depth, sparse, spatial_sigma, depth_sigma, backend, outliers, dtype)
+    })["z_filled"]
+
+    mapping_key = stage_key("mapping", interp_key, sparse, ir_coeffs, rgb_coeffs, ir_inverse, rgb_inverse,
+                            pipeline.IR_SIZE, pipeline.RGB_SIZE, backend)
+    mapping = fetch("mapping", mapping_key, lambda: {
+        "mapping": pipeline.map_depth(z_filled, sparse, ir_coeffs, rgb_coeffs, pipeline.IR_SIZE,
+                                      pipeline.RGB_SIZE, ir_inverse, rgb_inverse, backend)
+    })["mapping"]
+
+    rgb_shape = read_image_shape(rgb_path)
+
+    def warp():
+        warped_ir, mask = pipeline.warp_ir(mapping, read_ir(ir_path), pipeline.IR_SIZE, pipeline.RGB_SIZE, backend,
+                                           rgb_shape)
+        return {"warped_ir": warped_ir, "mask": mask}
+
+    warp_key = stage_key("warp", mapping_key, file_digest(ir_path), rgb_shape)
+    warped = fetch("warp", warp_key, warp)
+
+    alignment = pipeline.Alignment(z_filled, mapping, warped["warped_ir"], warped["mask"],
+                                   len(mapping) / z_filled.size)
+    rgb = read_rgb(rgb_path) if figure else None
+    pipeline.export_outputs(output_dir, depth, alignment, rgb, save_text, png, figure)
+    return {"folder": folder, "output_dir": output_dir, "computed": computed}
+
+
+def run_batch(folders, output_root="batch_output", cache_root=CACHE_DIR, workers=None, **kwargs):
+    """
+    Processes capture folders in a process pool.
+
+    Failures are reported per folder and do not stop the batch.
+
+    Returns:
+        list of per-folder result dicts; failed folders carry an "error" entry
+    """
+    folders = list(folders)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_capture, folder, cache_root,
+                            os.path.join(output_root, output_name(folder)), **kwargs)
+            for folder in folders
+        ]
+        for folder, future in zip(folders, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"folder": folder, "error": f"{type(e).__name__}: {e}"}
+            results.append(result)
+    return results
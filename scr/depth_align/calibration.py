@@ -0,0 +1,112 @@
+"""
+Chessboard-based calibration of the depth-dependent homography model.
+
+Corners are normally read from a binary corner dataset (see corners.py).
+Legacy corner files hold one "x, y" pair per line; combined files
+concatenate the corners of several captures, separated by "# From file:"
+comments, with the same number of corners per depth.
+"""
+import os
+
+import numpy as np
+
+from .estimation import estimate_homographies
+from .homography import fit_linear_model
+
+# Number of chessboard corners per depth (e.g., 6x7 grid = 42)
+POINTS_PER_DEPTH = 42
+
+# The list of depths (in cm) used when capturing the data
+DEPTHS = [100, 150, 200, 250]
+
+# Default file name of the binary corner dataset
+CORNER_DATASET = "corners.npz"
+
+
+def load_corners(filepath):
+    """
+    Loads corner coordinates from a text file, skipping comments and blank lines.
+
+    Returns:
+        np.ndarray of shape (N, 2), float32
+    """
+    with open(filepath, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return np.array([list(map(float, line.split(","))) for line in lines], dtype=np.float32).reshape(-1, 2)
+
+
+def load_corners_by_depth(filepath, points_per_depth=POINTS_PER_DEPTH):
+    """
+    Reads 2D corner coordinates from a combined corner file.
+    Each depth level has the same number of corner points (e.g., 42).
+    This function splits all the loaded points into separate groups — one group for each depth.
+    """
+    points = load_corners(filepath)
+    return np.array_split(points, len(points) // points_per_depth)
+
+
+def combine_corner_files(input_files, output_file):
+    """Combines multiple checkerboard corner files into one file."""
+    with open(output_file, 'w') as fout:
+        for file in input_files:
+            try:
+                # Open each input file and read non-empty lines
+                with open(file, 'r') as fin:
+                    lines = [line.strip() for line in fin if line.strip()]
+
+                    # Add a comment indicating which file the lines came from
+                    fout.write(f"# From file: {file}\n")
+                    fout.write('\n'.join(lines) + '\n')
+            except Exception as e:
+                print(f"Error reading {file}: {e}")
+
+    print(f"Combined file saved as: {output_file}")
+
+
+def homographies_by_depth(src_sets, dst_sets, ransac=False, threshold=3.0):
+    """
+    Computes one homography per depth mapping src corners onto dst corners.
+
+    All depths are solved together with the batched normalized DLT.
+
+    Returns:
+        np.ndarray of shape (num_depths, 3, 3)
+    """
+    return estimate_homographies(src_sets, dst_sets, ransac=ransac, threshold=threshold)
+
+
+def fit_two_depths(src_sets, dst_sets, depth_1, depth_2, depths=DEPTHS, ransac=False):
+    """
+    Fits the linear depth model from the captures at two of the calibrated depths.
+
+    Returns:
+        dict of (a, b) coefficients per element
+    """
+    idx_1 = depths.index(depth_1)
+    idx_2 = depths.index(depth_2)
+    H = homographies_by_depth([src_sets[idx_1], src_sets[idx_2]], [dst_sets[idx_1], dst_sets[idx_2]], ransac)
+    return fit_linear_model([depth_1, depth_2], H)
+
+
+def load_calibration_corners(folder=".", dataset_path=None):
+    """
+    Loads the corner dataset of a calibration folder.
+
+    An explicit dataset_path (with or without its .npz suffix) must exist.
+    Without one, corners.npz in the folder is used when present; otherwise the
+    legacy combined_corners{B,I,R}.txt files are converted using DEPTHS.
+
+    Returns:
+        CornerDataset
+    """
+    from .corners import CornerDataset, npz_path
+
+    if dataset_path:
+        path = npz_path(dataset_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"corner dataset '{path}' not found")
+        return CornerDataset.load(path)
+    path = os.path.join(folder, CORNER_DATASET)
+    if os.path.exists(path):
+        return CornerDataset.load(path)
+    return CornerDataset.from_text(folder, DEPTHS)
@@ -0,0 +1,467 @@
+"""
+Command-line entry points.
+
+All commands run headless by default: figures are rendered only with
+--figure/--show, and matplotlib and OpenCV are imported only by the code
+paths that need them.
+"""
+import argparse
+import os
+
+
+def _add_model_arguments(parser):
+    """Adds the processing and homography model options shared by the alignment commands."""
+    parser.add_argument("--sparse", action="store_true", help="interpolate and project valid depth pixels only")
+    parser.add_argument("--ir-model", help="linear IR homography model file (default: built-in)")
+    parser.add_argument("--rgb-model", help="linear RGB homography model file (default: built-in)")
+    parser.add_argument("--ir-inverse", help="inverse IR model file; replaces per-pixel inversion")
+    parser.add_argument("--rgb-inverse", help="inverse RGB model file; replaces per-pixel inversion")
+    parser.add_argument("--backend", choices=["auto", "numpy", "numba"], default="auto",
+                        help="kernels for interpolation, projection and splat (auto: numba if installed)")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64",
+                        help="floating-point precision of the depth, interpolation and projection stages")
+
+
+def _load_models(parser, args):
+    """Returns the model keyword arguments selected by _add_model_arguments options."""
+    from . import homography
+
+    ir_coeffs = homography.read_linear_model(args.ir_model) if args.ir_model else homography.IR_COEFFS
+    rgb_coeffs = homography.read_linear_model(args.rgb_model) if args.rgb_model else homography.RGB_COEFFS
+    ir_inverse = rgb_inverse = None
+    if args.ir_inverse or args.rgb_inverse:
+        from .inverse import read_inverse_model
+
+        if not (args.ir_inverse and args.rgb_inverse):
+            parser.error("--ir-inverse and --rgb-inverse must be given together")
+        ir_inverse = read_inverse_model(args.ir_inverse)
+        rgb_inverse = read_inverse_model(args.rgb_inverse)
+    return dict(sparse=args.sparse, ir_coeffs=ir_coeffs, rgb_coeffs=rgb_coeffs, ir_inverse=ir_inverse,
+                rgb_inverse=rgb_inverse, backend=args.backend, dtype=args.precision)
+
+
+def pipeline_main(argv=None):
+    """depth-align: align IR onto RGB for one capture folder."""
+    from . import pipeline
+
+    parser = argparse.ArgumentParser(prog="depth-align", description="Depth-aware IR to RGB alignment.")
+    parser.add_argument("folder", nargs="?", default=".", help="capture folder with blaze.ply, ir.tif and rgb.tif")
+    parser.add_argument("-o", "--output-dir", default=".", help="where results are written")
+    parser.add_argument("--no-text", action="store_true", help="skip the depth and mapping text tables")
+    _add_model_arguments(parser)
+    parser.add_argument("--fused", choices=["nearest", "bilinear"],
+                        help="gather IR and RGB into the ToF grid and save a fused RGB-D-IR .npy instead")
+    parser.add_argument("--png", action="store_true", help="save the warped IR image as PNG")
+    parser.add_argument("--figure", action="store_true", help="save the cropped side-by-side figure")
+    parser.add_argument("--show", action="store_true", help="display the side-by-side figure")
+    args = parser.parse_args(argv)
+
+    pipeline.run(args.folder, args.output_dir, save_text=not args.no_text, png=args.png, figure=args.figure,
+                 show=args.show, fused=args.fused, **_load_models(parser, args))
+
+
+def precision_main(argv=None):
+    """depth-align-precision: compare the float32 path with float64 on capture folders."""
+    from . import pipeline
+    from .loader import FrameLoader, find_captures
+
+    parser = argparse.ArgumentParser(prog="depth-align-precision",
+                                     description="Report the coordinate error of the float32 path against float64.")
+    parser.add_argument("folders", nargs="*", help="capture folders (default: every capture below --root)")
+    parser.add_argument("--root", default="res", help="folder searched for bundled captures")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="largest acceptable coordinate difference in pixels")
+    _add_model_arguments(parser)
+    args = parser.parse_args(argv)
+
+    folders = args.folders or find_captures(args.root)
+    if not folders:
+        parser.error(f"no captures found below '{args.root}'")
+    options = _load_models(parser, args)
+    options.pop("dtype")
+
+    worst = 0.0
+    print(f"{'capture':40s} {'depth mm':>10s} {'IR px':>10s} {'RGB px':>10s} {'rounded':>9s}")
+    for folder, frame in zip(folders, FrameLoader(folders)):
+        report = pipeline.compare_precision(frame, **options)
+        worst = max(worst, report["coordinates"])
+        print(f"{folder:40s} {report['depth']:10.4g} {report['ir']:10.4g} {report['rgb']:10.4g} "
+              f"{report['rounded_mismatch']:9.4%}")
+    verdict = "below" if worst < args.threshold else "above"
+    print(f"Max coordinate difference {worst:.4g} px is {verdict} the {args.threshold:g} px threshold")
+    if worst >= args.threshold:
+        raise SystemExit(1)
+
+
+def _capture_folders(paths):
+    """Expands capture folders and manifest files into a list of folders."""
+    from .batch import read_manifest
+
+    folders = []
+    for path in paths:
+        folders += [path] if os.path.isdir(path) else read_manifest(path)
+    return folders
+
+
+def sequence_main(argv=None):
+    """depth-align-sequence: store aligned captures in a chunked sequence and export images from it."""
+    from .sink import CHUNK_FRAMES
+
+    parser = argparse.ArgumentParser(prog="depth-align-sequence",
+                                     description="Chunked, memory-mapped storage of aligned sequences.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    write = sub.add_parser("write", help="align captures in order and append them to a sequence")
+    write.add_argument("sequence", help="sequence folder, continued if it exists")
+    write.add_argument("inputs", nargs="+", help="capture folders, or manifest files listing one folder per line")
+    write.add_argument("--chunk-frames", type=int, default=CHUNK_FRAMES, help="frames per chunk file of a new sequence")
+    write.add_argument("--no-rgb", action="store_true", help="do not store the RGB image of each frame")
+    _add_model_arguments(write)
+
+    export = sub.add_parser("export", help="render stored frames as PNG images")
+    export.add_argument("sequence")
+    export.add_argument("-o", "--output-dir", default="sequence_png")
+    export.add_argument("--frames", type=int, nargs="+", help="frame indices (default: all)")
+    export.add_argument("--figure", action="store_true", help="also save cropped side-by-side figures")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        from . import pipeline
+        from .sink import export_png
+
+        export_png(args.sequence, args.output_dir, args.frames, args.figure, pipeline.CROP)
+        print(f"Exported frames of '{args.sequence}' to '{args.output_dir}'")
+        return
+
+    from . import pipeline
+
+    count = pipeline.run_sequence(_capture_folders(args.inputs), args.sequence, args.chunk_frames,
+                                  store_rgb=not args.no_rgb, **_load_models(parser, args))
+    print(f"Sequence '{args.sequence}' holds {count} frames")
+
+
+def batch_main(argv=None):
+    """depth-align-batch: align many capture folders, resuming from cached stage results."""
+    from . import batch
+
+    parser = argparse.ArgumentParser(prog="depth-align-batch",
+                                     description="Resumable depth-aware alignment of many capture folders.")
+    parser.add_argument("inputs", nargs="+", help="capture folders, or manifest files listing one folder per line")
+    parser.add_argument("-o", "--output-dir", default="batch_output",
+                        help="results go to one subfolder per capture")
+    parser.add_argument("--cache", default=batch.CACHE_DIR, help="artifact cache folder")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-text", action="store_true", help="skip the depth and mapping text tables")
+    _add_model_arguments(parser)
+    parser.add_argument("--png", action="store_true", help="save the warped IR images as PNG")
+    parser.add_argument("--figure", action="store_true", help="save the cropped side-by-side figures")
+    args = parser.parse_args(argv)
+
+    results = batch.run_batch(_capture_folders(args.inputs), args.output_dir, args.cache, args.jobs,
+                              save_text=not args.no_text, png=args.png, figure=args.figure,
+                              **_load_models(parser, args))
+
+    failed = 0
+    for result in results:
+        if "error" in result:
+            failed += 1
+            print(f"FAILED {result['folder']}: {result['error']}")
+        else:
+            computed = ", ".join(result["computed"]) or "all cached"
+            print(f"ok     {result['folder']} -> {result['output_dir']} ({computed})")
+    print(f"{len(results) - failed}/{len(results)} captures aligned")
+    if failed:
+        raise SystemExit(1)
+
+
+def calibrate_main(argv=None):
+    """depth-align-calibrate: build the corner dataset, fit and plot the depth model."""
+    from . import calibration
+
+    parser = argparse.ArgumentParser(prog="depth-align-calibrate",
+                                     description="Depth-dependent homography calibration.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_source(cmd):
+        cmd.add_argument("--corners-dir", default=".",
+                         help="folder with corners.npz or legacy combined_corners{B,I,R}.txt")
+        cmd.add_argument("--dataset", help="corner dataset (.npz); overrides --corners-dir")
+        cmd.add_argument("--ransac", action="store_true", help="reject outlier corners when fitting homographies")
+
+    fit = sub.add_parser("fit", help="fit the linear depth model from two depths")
+    fit.add_argument("pair", choices=["rgb", "ir"], help="rgb: ToF to RGB, ir: IR to Blaze")
+    fit.add_argument("depth_1", type=float)
+    fit.add_argument("depth_2", type=float)
+    add_source(fit)
+    fit.add_argument("-o", "--output", default="linear_depth_homography.txt")
+    fit.add_argument("--inverse-output", help="also export a direct model of H(d)^-1 over the fitted range")
+    fit.add_argument("--inverse-degree", type=int, default=2)
+
+    invert = sub.add_parser("invert", help="fit and validate a direct model of H(d)^-1")
+    invert.add_argument("model", help="linear model file, or 'ir' / 'rgb' for the built-in coefficients")
+    invert.add_argument("d_min", type=float, help="lower end of the calibrated depth range (cm)")
+    invert.add_argument("d_max", type=float, help="upper end of the calibrated depth range (cm)")
+    invert.add_argument("--degree", type=int, default=2, help="polynomial degree per element")
+    invert.add_argument("-o", "--output", default="inverse_depth_homography.txt")
+
+    combine = sub.add_parser("combine", help="combine per-capture corner files")
+    combine.add_argument("output")
+    combine.add_argument("inputs", nargs="+")
+
+    convert = sub.add_parser("convert", help="convert combined corner text files to a corner dataset")
+    convert.add_argument("--corners-dir", default=".", help="folder with combined_corners{B,I,R}.txt")
+    convert.add_argument("--depths", type=float, nargs="+", default=calibration.DEPTHS,
+                         help="depth in cm of each capture, in file order")
+    convert.add_argument("--size", type=int, nargs=2, default=(7, 6), metavar=("COLS", "ROWS"))
+    convert.add_argument("-o", "--output", default=calibration.CORNER_DATASET)
+
+    update = sub.add_parser("update", help="fold new captures into an online calibration state")
+    update.add_argument("pair", choices=["rgb", "ir"], help="rgb: RGB to Blaze, ir: IR to Blaze")
+    update.add_argument("state", help="calibration state file (.npz), created if missing")
+    update.add_argument("depths", type=float, nargs="*", help="depths to fold in (default: all in the dataset)")
+    add_source(update)
+    update.add_argument("--forgetting", type=float,
+                        help="weight kept by earlier captures per update, in (0, 1]; "
+                             "replaces the stored value of an existing state (default: 1.0)")
+    update.add_argument("-o", "--output", default="linear_depth_homography.txt")
+
+    plot = sub.add_parser("plot", help="plot homography elements against depth")
+    add_source(plot)
+    plot.add_argument("-o", "--output", default="homography_plot.png")
+    plot.add_argument("--show", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "combine":
+        calibration.combine_corner_files(args.inputs, args.output)
+        return
+
+    if args.command == "invert":
+        from . import homography
+        from .inverse import export_inverse_model
+
+        builtin = {"ir": homography.IR_COEFFS, "rgb": homography.RGB_COEFFS}
+        coeffs = builtin.get(args.model) or homography.read_linear_model(args.model)
+        _, max_error, mean_error = export_inverse_model(coeffs, args.d_min, args.d_max, args.output, args.degree)
+        print(f"Inverse model error over {args.d_min:g}-{args.d_max:g} cm: "
+              f"max {max_error:.4f} px, mean {mean_error:.4f} px")
+        print(f"Saved inverse model to '{args.output}'")
+        return
+
+    if args.command == "convert":
+        from .corners import CornerDataset, npz_path
+
+        try:
+            dataset = CornerDataset.from_text(args.corners_dir, args.depths, tuple(args.size))
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        dataset.save(args.output)
+        print(f"Saved {len(dataset)} captures to '{npz_path(args.output)}'")
+        return
+
+    try:
+        dataset = calibration.load_calibration_corners(args.corners_dir, args.dataset)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    if args.command == "fit":
+        from .homography import write_linear_model
+
+        src, dst = ("tof", "rgb") if args.pair == "rgb" else ("ir", "tof")
+        depths, src_sets, dst_sets = dataset.paired(src, dst)
+        for depth in (args.depth_1, args.depth_2):
+            if depth not in depths:
+                parser.error(f"depth {depth:g} is not one of {depths}")
+        coeffs = calibration.fit_two_depths(src_sets, dst_sets, args.depth_1, args.depth_2, depths,
+                                            ransac=args.ransac)
+        if args.pair == "rgb":
+            write_linear_model(coeffs, args.output)
+            print(f"Saved homography model from ToF to RGB to '{args.output}'")
+        else:
+            write_linear_model(coeffs, args.output, title="IR to Blaze Homography Coefficients")
+            print(f"Saved homography model from IR to Blaze to '{args.output}'")
+        if args.inverse_output:
+            from .inverse import export_inverse_model
+
+            if args.pair == "rgb":
+                # The runtime model maps RGB to ToF; its inverse is the ToF-to-RGB projection
+                depths, src_sets, dst_sets = dataset.paired("rgb", "tof")
+                coeffs = calibration.fit_two_depths(src_sets, dst_sets, args.depth_1, args.depth_2, depths,
+                                                    ransac=args.ransac)
+            d_min, d_max = sorted((args.depth_1, args.depth_2))
+            _, max_error, mean_error = export_inverse_model(coeffs, d_min, d_max, args.inverse_output,
+                                                            args.inverse_degree)
+            print(f"Saved inverse model to '{args.inverse_output}' "
+                  f"(max error {max_error:.4f} px, mean {mean_error:.4f} px)")
+        return
+
+    if args.command == "update":
+        from .homography import write_linear_model
+        from .online import OnlineCalibration
+
+        # Fold in the runtime direction (camera to ToF) so the model can replace RGB_COEFFS / IR_COEFFS
+        src, dst = ("rgb", "tof") if args.pair == "rgb" else ("ir", "tof")
+        state = args.state if args.state.endswith(".npz") else args.state + ".npz"
+        if os.path.exists(state):
+            model = OnlineCalibration.load(state)
+            if args.forgetting is not None and args.forgetting != model.forgetting:
+                if not 0 < args.forgetting <= 1:
+                    parser.error("--forgetting must be in (0, 1]")
+                print(f"Changing forgetting factor from {model.forgetting} to {args.forgetting}")
+                model.forgetting = args.forgetting
+        else:
+            model = OnlineCalibration(forgetting=1.0 if args.forgetting is None else args.forgetting)
+        # Captures already in the state are skipped, so replaying the dataset only adds new ones
+        folded = 0
+        for depth, src_corners, dst_corners in zip(*dataset.paired(src, dst)):
+            if not args.depths or depth in args.depths:
+                folded += model.add_capture(depth, src_corners, dst_corners, ransac=args.ransac)
+        model.save(state)
+        print(f"Folded {folded} new capture(s) into the calibration state")
+        if model.coeffs is None:
+            print("Need captures at two distinct depths before a model can be written")
+            return
+        title = "RGB to Blaze Homography Coefficients" if args.pair == "rgb" else "IR to Blaze Homography Coefficients"
+        write_linear_model(model.coeffs, args.output, title=title)
+        print(f"Updated calibration state '{state}' and model '{args.output}'")
+        return
+
+    from .plotting import homography_elements
+
+    depths, corners_i, corners_b = dataset.paired("ir", "tof")
+    rgb_depths, corners_r, corners_b_rgb = dataset.paired("rgb", "tof")
+    if rgb_depths != depths:
+        parser.error("IR and RGB captures must share the same depths to be plotted together")
+    H_ir = calibration.homographies_by_depth(corners_i, corners_b, ransac=args.ransac)
+    H_rgb = calibration.homographies_by_depth(corners_r, corners_b_rgb, ransac=args.ransac)
+    homography_elements(depths, H_ir, H_rgb, args.output, args.show)
+
+
+def detect_main(argv=None):
+    """depth-align-detect: chessboard corners and circular targets."""
+    parser = argparse.ArgumentParser(prog="depth-align-detect", description="Calibration target detection.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    chess = sub.add_parser("chessboard", help="detect chessboard corners")
+    chess.add_argument("image")
+    chess.add_argument("--size", type=int, nargs=2, default=(7, 6), metavar=("COLS", "ROWS"))
+    chess.add_argument("-o", "--output", default="chessboard_corners.txt")
+    chess.add_argument("--interactive", action="store_true", help="tune thresholds in a window before detecting")
+    chess.add_argument("--dataset", help="also append the corners to this corner dataset (.npz)")
+    chess.add_argument("--depth", type=float, help="capture depth in cm, required with --dataset")
+    chess.add_argument("--sensor", choices=["tof", "ir", "rgb"], help="capture sensor, required with --dataset")
+    chess.add_argument("--preview", help="save the image with drawn corners")
+    chess.add_argument("--show", action="store_true")
+
+    ir = sub.add_parser("ir-circle", help="measure the largest bright blob in an IR image")
+    ir.add_argument("image")
+    ir.add_argument("-o", "--output", default="analysis_results.txt")
+    ir.add_argument("--preview", default="analysis_output.png")
+
+    circles = sub.add_parser("circles", help="detect circles in IR and RGB images")
+    circles.add_argument("ir_image")
+    circles.add_argument("rgb_image")
+    circles.add_argument("-o", "--output", default="detected_circles.txt")
+    circles.add_argument("--show", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    import cv2
+    import numpy as np
+
+    from . import detection
+
+    if args.command == "chessboard":
+        size = tuple(args.size)
+        if args.dataset and (args.depth is None or args.sensor is None):
+            parser.error("--dataset requires --depth and --sensor")
+        if args.interactive:
+            gray = cv2.imread(args.image, cv2.IMREAD_GRAYSCALE)
+            corners = detection.interactive_chessboard(gray, size, args.output,
+                                                       args.preview or "chessboard_detected.png")
+            image = None
+        else:
+            image = cv2.imread(args.image)
+            corners = detection.find_chessboard_corners(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), size)
+            if corners is None:
+                print("Chessboard not found.")
+            else:
+                detection.save_corners(corners, args.output)
+                detection.draw_chessboard_corners(image, corners, size)
+                print("Corners found.")
+                print(f"Saved to {args.output}")
+        if args.dataset and corners is not None:
+            from .corners import append_capture
+
+            append_capture(args.dataset, args.depth, args.sensor, corners, size)
+            print(f"Added {args.sensor} capture at {args.depth:g} cm to {args.dataset}")
+        if image is None:
+            return
+        if args.preview:
+            cv2.imwrite(args.preview, image)
+        if args.show:
+            from .plotting import images
+
+            title = f"Chessboard Detected ({size[0]}x{size[1]})" if corners is not None else f"Not Found ({size[0]}x{size[1]})"
+            images([(title, cv2.cvtColor(image, cv2.COLOR_BGR2RGB))], show=True, figsize=(10, 8))
+
+    elif args.command == "ir-circle":
+        gray = cv2.imread(args.image, cv2.IMREAD_GRAYSCALE)
+        (cX, cY), max_distance, avg_distance, output = detection.detect_ir_circle(gray)
+        cv2.imwrite(args.preview, output)
+        lines = [f"Center: ({cX}, {cY})",
+                 f"Max distance to contour: {max_distance:.2f} px",
+                 f"Average distance to contour: {avg_distance:.2f} px"]
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        print("\n".join(lines))
+
+    else:
+        all_results = []
+        panels = []
+        for path, label in ((args.ir_image, "IR"), (args.rgb_image, "RGB")):
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                print(f"Error: Could not load {path}")
+                panels.append((f"{label} Circles", None))
+                continue
+            results, output = detection.detect_circles(gray, label)
+            cv2.imwrite(f"{label.lower()}_circles.png", output)
+            all_results += results
+            panels.append((f"{label} Circles", cv2.cvtColor(output, cv2.COLOR_BGR2RGB)))
+
+        print(f"\nTotal circles detected: {len(all_results)}")
+        if all_results:
+            np.savetxt(args.output, np.array(all_results, dtype=object), fmt="%s %d %d %d %d",
+                       header="Image Circle# Center_X Center_Y Radius", comments='')
+            print(f"Results saved to {args.output}")
+        else:
+            print("No circles found.")
+        if args.show:
+            from .plotting import images
+
+            images(panels, show=True)
+
+
+def overlay_main(argv=None):
+    """depth-align-overlay: chessboard overlay of all three sensors at one depth."""
+    parser = argparse.ArgumentParser(prog="depth-align-overlay",
+                                     description="Overlay Blaze, IR and RGB chessboard captures at one depth.")
+    parser.add_argument("depth", type=int, help="depth label of the capture files, e.g. 100")
+    parser.add_argument("--folder", default=".", help="folder with the images and corner files")
+    parser.add_argument("-o", "--output", help="save the overlay image")
+    parser.add_argument("--show", action="store_true")
+    args = parser.parse_args(argv)
+
+    from .overlay import overlay_images_with_corner_dots
+
+    overlay = overlay_images_with_corner_dots(args.depth, args.folder)
+    if args.output:
+        import cv2
+
+        cv2.imwrite(args.output, overlay)
+    if args.show:
+        from .plotting import images
+
+        images([(f"Overlay at {args.depth} cm with Chessboard Dots", overlay[..., ::-1])],
+               show=True, figsize=(10, 8))
@@ -0,0 +1,145 @@
+"""
+Binary corner dataset for depth calibration.
+
+All chessboard captures of a calibration set live in one .npz file: every
+capture records its depth, sensor, board size and detected corners. Corners
+of all captures are stored back to back in a single float32 array with an
+offsets table, so loading is a plain array read with no text parsing and
+each capture is a view into that array.
+"""
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Sensor names and the suffix of their legacy combined_corners{X}.txt files
+SENSORS = {"tof": "B", "ir": "I", "rgb": "R"}
+
+
+class CornerDataset:
+    """
+    Chessboard corners of many captures, indexed by depth and sensor.
+
+    Attributes:
+        depths (np.ndarray): (C,) capture depth in cm
+        sensors (np.ndarray): (C,) sensor name per capture ("tof", "ir", "rgb")
+        board_sizes (np.ndarray): (C, 2) inner corners (columns, rows)
+        points (np.ndarray): (N, 2) float32 corners of all captures
+        offsets (np.ndarray): (C + 1,) capture i owns points[offsets[i]:offsets[i + 1]]
+    """
+
+    def __init__(self, depths=(), sensors=(), board_sizes=(), points=None, offsets=None):
+        self.depths = np.asarray(depths, dtype=np.float64).reshape(-1)
+        self.sensors = np.asarray(sensors, dtype="<U8").reshape(-1)
+        self.board_sizes = np.asarray(board_sizes, dtype=np.int32).reshape(-1, 2)
+        self.points = np.zeros((0, 2), np.float32) if points is None else np.asarray(points, np.float32).reshape(-1, 2)
+        self.offsets = np.zeros(1, np.int64) if offsets is None else np.asarray(offsets, np.int64)
+        if not (len(self.depths) == len(self.sensors) == len(self.board_sizes) == len(self.offsets) - 1):
+            raise ValueError("capture arrays have inconsistent lengths")
+        if self.offsets[-1] != len(self.points):
+            raise ValueError("offsets do not cover the corner array")
+
+    def __len__(self):
+        return len(self.depths)
+
+    def corners(self, i):
+        """Returns the (n, 2) corners of capture i."""
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def add(self, depth, sensor, corners, board_size):
+        """Appends one capture."""
+        if sensor not in SENSORS:
+            raise ValueError(f"unknown sensor '{sensor}', expected one of {sorted(SENSORS)}")
+        corners = np.asarray(corners, dtype=np.float32).reshape(-1, 2)
+        self.depths = np.append(self.depths, float(depth))
+        self.sensors = np.append(self.sensors, np.asarray(sensor, dtype=self.sensors.dtype))
+        self.board_sizes = np.vstack([self.board_sizes, np.asarray(board_size, np.int32).reshape(1, 2)])
+        self.points = np.vstack([self.points, corners])
+        self.offsets = np.append(self.offsets, len(self.points))
+
+    def select(self, sensor):
+        """
+        Returns the captures of one sensor ordered by depth.
+
+        Returns:
+            depths (np.ndarray), list of (n, 2) corner arrays
+        """
+        idx = np.flatnonzero(self.sensors == sensor)
+        idx = idx[np.argsort(self.depths[idx], kind="stable")]
+        return self.depths[idx], [self.corners(i) for i in idx]
+
+    def paired(self, src, dst):
+        """
+        Matches the captures of two sensors taken at the same depths.
+
+        Returns:
+            depths (list), src corner sets, dst corner sets
+        """
+        src_depths, src_sets = self.select(src)
+        dst_depths, dst_sets = self.select(dst)
+        dst_by_depth = dict(zip(dst_depths.tolist(), dst_sets))
+        depths, src_out, dst_out = [], [], []
+        for depth, corners in zip(src_depths.tolist(), src_sets):
+            if depth in dst_by_depth:
+                if len(corners) != len(dst_by_depth[depth]):
+                    raise ValueError(f"{src} and {dst} corner counts differ at {depth:g} cm")
+                depths.append(depth)
+                src_out.append(corners)
+                dst_out.append(dst_by_depth[depth])
+        return depths, src_out, dst_out
+
+    def save(self, file_path):
+        """Writes the dataset as an uncompressed .npz file."""
+        np.savez(npz_path(file_path), version=FORMAT_VERSION, depths=self.depths, sensors=self.sensors,
+                 board_sizes=self.board_sizes, points=self.points, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, file_path):
+        """Reads a dataset written by save."""
+        file_path = npz_path(file_path)
+        with np.load(file_path, allow_pickle=False) as data:
+            if int(data["version"]) > FORMAT_VERSION:
+                raise ValueError(f"{file_path}: unsupported corner dataset version {int(data['version'])}")
+            return cls(data["depths"], data["sensors"], data["board_sizes"], data["points"], data["offsets"])
+
+    @classmethod
+    def from_text(cls, folder, depths, board_size=(7, 6), sensors=SENSORS):
+        """
+        Converts legacy combined_corners{B,I,R}.txt files into a dataset.
+
+        The text files carry no depth labels, so the captures in each file are
+        assumed to follow the given depths in order with board_size corners each.
+        Sensors without a file are left out; at least one file must exist.
+        """
+        from .calibration import load_corners
+
+        paths = {sensor: os.path.join(folder, f"combined_corners{suffix}.txt") for sensor, suffix in sensors.items()}
+        if not any(os.path.exists(path) for path in paths.values()):
+            raise FileNotFoundError(f"no corner dataset or combined_corners*.txt files in '{folder}'")
+        dataset = cls()
+        for sensor, path in paths.items():
+            if not os.path.exists(path):
+                continue
+            points = load_corners(path)
+            per_capture = board_size[0] * board_size[1]
+            if len(points) != per_capture * len(depths):
+                raise ValueError(f"{path}: expected {len(depths)} captures of {per_capture} corners, "
+                                 f"found {len(points)} corners")
+            for depth, corners in zip(depths, np.split(points, len(depths))):
+                dataset.add(depth, sensor, corners, board_size)
+        return dataset
+
+
+def npz_path(file_path):
+    """Adds the .npz suffix that np.savez appends, so paths with and without it agree."""
+    return file_path if file_path.endswith(".npz") else file_path + ".npz"
+
+
+def append_capture(file_path, depth, sensor, corners, board_size):
+    """Adds one capture to the dataset at file_path, creating it if needed."""
+    file_path = npz_path(file_path)
+    dataset = CornerDataset.load(file_path) if os.path.exists(file_path) else CornerDataset()
+    dataset.add(depth, sensor, corners, board_size)
+    dataset.save(file_path)
+    return dataset
@@ -0,0 +1,228 @@
+"""
+Depth map preprocessing: outlier rejection and edge-aware hole filling.
+
+Depth is in mm. NaN marks missing or rejected pixels, while 0 marks pixels the
+ToF camera reported without range; the latter are kept as 0 throughout.
+"""
+import warnings
+
+import numpy as np
+
+# Depth interval (mm) binned by histogram_bounds; covers the ToF range of either sign
+DEPTH_RANGE = (-10000.0, 10000.0)
+HISTOGRAM_BINS = 8192  # about 2.4 mm per bin over DEPTH_RANGE
+
+
+def filter_outliers(z_map, low=1, high=99):
+    """Sets depths outside the [low, high] percentiles to NaN, keeping zeros."""
+    valid = z_map[~np.isnan(z_map) & (z_map != 0)]
+    z_min, z_max = np.percentile(valid, [low, high])
+    return np.where(((z_map >= z_min) & (z_map <= z_max)) | (z_map == 0), z_map, np.nan)
+
+
+def histogram_bounds(z_map, low=1, high=99, bins=HISTOGRAM_BINS, z_range=DEPTH_RANGE):
+    """
+    Approximates the [low, high] percentiles of the valid depths with a fixed-bin histogram.
+
+    One counting pass replaces the sort of np.percentile. NaN and out-of-range
+    values fall outside the histogram and zeros are removed from their bin.
+    The bounds are widened to whole bins, so they never reject a depth that
+    the exact percentiles would keep.
+
+    Returns:
+        z_min, z_max (float), or None if there are no valid depths
+    """
+    counts, edges = np.histogram(z_map, bins=bins, range=z_range)
+    if z_range[0] <= 0 <= z_range[1]:
+        zero_bin = min(int((0 - z_range[0]) / (z_range[1] - z_range[0]) * bins), bins - 1)
+        counts[zero_bin] -= np.count_nonzero(z_map == 0)
+    cdf = np.cumsum(counts)
+    total = cdf[-1]
+    if total == 0:
+        return None
+    # Bins holding the sorted samples that np.percentile interpolates between
+    lo = np.searchsorted(cdf, np.floor((total - 1) * low / 100), side="right")
+    hi = np.searchsorted(cdf, np.ceil((total - 1) * high / 100), side="right")
+    return float(edges[min(lo, bins - 1)]), float(edges[min(hi, bins - 1) + 1])
+
+
+def reject_outliers(z_map, low=1, high=99, bins=HISTOGRAM_BINS, z_range=DEPTH_RANGE, bounds=None):
+    """
+    Sets depths outside the histogram percentile bounds to NaN in place, keeping zeros.
+
+    Faster counterpart of filter_outliers for float arrays. Precomputed
+    (z_min, z_max) bounds, e.g. of the full frame when z_map is a crop,
+    replace the histogram of z_map.
+
+    Returns:
+        z_map
+    """
+    if bounds is None:
+        bounds = histogram_bounds(z_map, low, high, bins, z_range)
+    if bounds is None:
+        return z_map
+    z_min, z_max = bounds
+    reject = z_map < z_min
+    reject |= z_map > z_max
+    reject &= z_map != 0
+    z_map[reject] = np.nan
+    return z_map
+
+
+def edge_aware_interpolation(z_map, spatial_sigma=1.0, depth_sigma=0.1, window_size=3, out=None):
+    """
+    Smooths the depth map and fills holes with a bilateral-style filter.
+
+    Each pixel is replaced by a weighted mean of its window, where weights
+    combine spatial distance and depth difference to the center. Missing
+    centers use the mean of their window as the reference depth. The result
+    is written to `out` when given.
+
+    Weights are computed in float64 for any input: with a small depth_sigma,
+    float32 exp underflows to zero for depth differences of about a
+    millimetre. Only the result takes the dtype of z_map.
+    """
+    padded = np.pad(z_map, pad_width=window_size//2, mode='reflect')
+    output = np.full_like(z_map, np.nan) if out is None else out
+
+    grid = np.arange(window_size) - window_size // 2
+    yy, xx = np.meshgrid(grid, grid)
+    spatial_weights = np.exp(-(xx**2 + yy**2) / (2 * spatial_sigma**2))
+
+    for r in range(z_map.shape[0]):
+        for c in range(z_map.shape[1]):
+            if z_map[r, c] == 0:
+                output[r, c] = 0
+                continue
+
+            patch = padded[r:r+window_size, c:c+window_size].astype(np.float64)
+            center_val = float(z_map[r, c])
+
+            if np.isnan(center_val):
+                if np.isnan(patch).all():
+                    center_val = 0
+                else:
+                    center_val = np.nanmean(patch)
+
+            depth_diff = patch - center_val
+            depth_weights = np.exp(-(depth_diff ** 2) / (2 * depth_sigma**2))
+            combined_weights = spatial_weights * depth_weights
+            combined_weights[np.isnan(patch)] = 0
+
+            if np.sum(combined_weights) > 0:
+                output[r, c] = np.nansum(patch * combined_weights) / np.sum(combined_weights)
+            else:
+                output[r, c] = center_val
+
+    return output
+
+
+def fill_nearest(z_map, indices=None):
+    """
+    Replaces remaining NaN values with the nearest valid depth.
+
+    With a preallocated int32 `indices` array of shape (2, H, W) for the
+    distance transform, z_map is filled in place.
+    """
+    nan_mask = np.isnan(z_map)
+    if not nan_mask.any():
+        return z_map
+    from scipy.ndimage import distance_transform_edt
+
+    if indices is None:
+        nearest_idx = distance_transform_edt(nan_mask, return_distances=False, return_indices=True)
+        return z_map[tuple(nearest_idx)]
+    distance_transform_edt(nan_mask, return_distances=False, return_indices=True, indices=indices)
+    z_map[nan_mask] = z_map[indices[0][nan_mask], indices[1][nan_mask]]
+    return z_map
+
+
+class TemporalFilter:
+    """
+    Temporal denoising of a depth stream over a ring buffer of recent frames.
+
+    Modes:
+        "median": per-pixel median of the last `size` frames, ignoring missing
+            samples; suppresses flicker and single-frame dropouts
+        "ema": exponential moving average with weight `alpha` for the new frame
+
+    Zeros (no range) and NaN are treated as missing samples. In both modes a
+    pixel's history expires after `size` consecutive missing samples, and a
+    pixel with no history keeps the value of the current frame, so depth that
+    has disappeared (e.g. an object leaving to out-of-range background) is not
+    reported indefinitely. With
+    `reset_threshold` (mm), pixels whose new depth differs from the smoothed
+    value by more are restarted from the new depth, so moving edges do not smear.
+    """
+
+    def __init__(self, size=5, mode="median", alpha=0.3, reset_threshold=None):
+        if mode not in ("median", "ema"):
+            raise ValueError(f"unknown temporal filter mode '{mode}'")
+        if size < 1 or not 0 < alpha <= 1:
+            raise ValueError("size must be at least 1 and alpha in (0, 1]")
+        self.size = size
+        self.mode = mode
+        self.alpha = alpha
+        self.reset_threshold = reset_threshold
+        self.reset()
+
+    def reset(self):
+        """Forgets all previous frames."""
+        self._buffer = None   # median: (size, H, W) ring buffer of samples
+        self._state = None    # ema: smoothed depth so far
+        self._missing = None  # ema: consecutive missing samples per pixel
+        self._count = 0
+
+    def update(self, depth):
+        """Adds a frame and returns its smoothed depth (float32, same shape)."""
+        current = np.array(depth, dtype=np.float32)
+        sample = current.copy()
+        sample[current == 0] = np.nan
+
+        history = self._state if self.mode == "ema" else self._buffer
+        if history is not None and history.shape[-2:] != sample.shape:
+            self.reset()
+
+        if self.mode == "ema":
+            if self._state is None:
+                self._state = sample.copy()
+                self._missing = np.zeros(sample.shape, dtype=np.int64)
+            else:
+                state = self._state
+                smoothed = state + self.alpha * (sample - state)
+                # Keep the previous value where the new sample is missing and vice versa
+                np.copyto(smoothed, state, where=np.isnan(sample))
+                np.copyto(smoothed, sample, where=np.isnan(state))
+                self._state = smoothed
+            missing = np.isnan(sample)
+            self._missing[missing] += 1
+            self._missing[~missing] = 0
+            self._state[self._missing >= self.size] = np.nan
+            if self.reset_threshold is not None:
+                with np.errstate(invalid="ignore"):
+                    jump = np.abs(sample - self._state) > self.reset_threshold
+                self._state[jump] = sample[jump]
+            smoothed = self._state.copy()
+        else:
+            if self._buffer is None:
+                self._buffer = np.full((self.size,) + sample.shape, np.nan, dtype=np.float32)
+            slot = self._count % self.size
+            self._buffer[slot] = sample
+            self._count += 1
+            smoothed = self._median()
+            if self.reset_threshold is not None:
+                with np.errstate(invalid="ignore"):
+                    jump = np.abs(sample - smoothed) > self.reset_threshold
+                self._buffer[:, jump] = np.nan
+                self._buffer[slot, jump] = sample[jump]
+                smoothed[jump] = sample[jump]
+
+        unknown = np.isnan(smoothed)
+        smoothed[unknown] = current[unknown]
+        return smoothed
+
+    def _median(self):
+        window = self._buffer[:min(self._count, self.size)]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # pixels without samples
+            return np.nanmedian(window, axis=0).astype(np.float32)
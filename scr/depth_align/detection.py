@@ -0,0 +1,187 @@
+"""
+Feature detection for calibration and validation: chessboard corners and
+circular targets in IR and RGB images. OpenCV is imported on first use.
+"""
+import numpy as np
+
+# Inner corners of the chessboard pattern (columns, rows)
+CHESSBOARD_SIZE = (7, 6)
+
+
+def find_chessboard_corners(gray, chessboard_size=CHESSBOARD_SIZE):
+    """
+    Detects chessboard corners in a grayscale image.
+
+    Returns:
+        np.ndarray of shape (N, 2), or None if the board was not found
+    """
+    import cv2
+
+    ret, corners = cv2.findChessboardCorners(gray, chessboard_size, None)
+    return corners.reshape(-1, 2) if ret else None
+
+
+def draw_chessboard_corners(image, corners, chessboard_size=CHESSBOARD_SIZE):
+    """Draws detected corners onto a BGR image in place."""
+    import cv2
+
+    cv2.drawChessboardCorners(image, chessboard_size, corners.reshape(-1, 1, 2), True)
+    return image
+
+
+def save_corners(corners, file_path, precision=6):
+    """Writes corners as one "x, y" line per point."""
+    with open(file_path, "w") as f:
+        for x, y in corners:
+            f.write(f"{x:.{precision}f}, {y:.{precision}f}\n")
+
+
+def threshold_bands(image, lower, upper):
+    """Quantizes an image into three bands: below, between and above the thresholds."""
+    lower, upper = min(lower, upper), max(lower, upper)
+    thresh_img = np.zeros_like(image)
+    thresh_img[(image >= lower) & (image <= upper)] = 127
+    thresh_img[image > upper] = 255
+    return thresh_img
+
+
+def interactive_chessboard(image, chessboard_size=CHESSBOARD_SIZE, corners_path="corners.txt",
+                           preview_path="chessboard_detected.png"):
+    """
+    Opens a window with trackbars to tune the thresholds for chessboard detection.
+
+    ENTER runs detection on the thresholded image, 's' saves the preview and
+    corners, and 'q' or ESC quits.
+    """
+    import cv2
+
+    window = "Threshold + Chessboard Detection"
+
+    def nothing(x):
+        pass
+
+    cv2.namedWindow(window)
+    cv2.createTrackbar("Lower", window, 50, 255, nothing)
+    cv2.createTrackbar("Upper", window, 200, 255, nothing)
+
+    corners = None
+    result_image = None
+    display_chessboard = False
+    last = None
+
+    while True:
+        t1 = cv2.getTrackbarPos("Lower", window)
+        t2 = cv2.getTrackbarPos("Upper", window)
+        thresh_img = threshold_bands(image, t1, t2)
+
+        # Reset preview if threshold values have changed
+        if (t1, t2) != last:
+            display_chessboard = False
+            last = (t1, t2)
+
+        if display_chessboard:
+            cv2.imshow(window, result_image)
+        else:
+            cv2.imshow(window, cv2.cvtColor(thresh_img, cv2.COLOR_GRAY2BGR))
+
+        key = cv2.waitKey(1) & 0xFF
+
+        if key == 13:  # ENTER key pressed
+            corners = find_chessboard_corners(thresh_img, chessboard_size)
+            result_image = cv2.cvtColor(thresh_img, cv2.COLOR_GRAY2BGR)
+            if corners is not None:
+                draw_chessboard_corners(result_image, corners, chessboard_size)
+                display_chessboard = True
+                print("Found")
+            else:
+                print("NOT found")
+
+        elif key == ord('s') and corners is not None:
+            cv2.imwrite(preview_path, result_image)
+            save_corners(corners, corners_path, precision=2)
+            print("Saved")
+
+        elif key == ord('q') or key == 27:
+            break
+
+    cv2.destroyAllWindows()
+    return corners
+
+
+def detect_ir_circle(gray):
+    """
+    Finds the largest bright blob in an IR image and measures its radius.
+
+    Returns:
+        center (tuple), max_distance (float), avg_distance (float), output (BGR visualization)
+    """
+    import cv2
+
+    # Blur, then Otsu's thresholding
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        raise Exception("No contours found!")
+    largest = max(contours, key=cv2.contourArea)
+
+    # Compute moments and center of mass
+    M = cv2.moments(largest)
+    cX = int(M["m10"] / M["m00"])
+    cY = int(M["m01"] / M["m00"])
+    center = (cX, cY)
+
+    # Distances from center to each contour point
+    distances = np.hypot(largest[:, 0, 0] - cX, largest[:, 0, 1] - cY)
+    max_distance = float(distances.max())
+    avg_distance = float(distances.mean())
+
+    output = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
+    cv2.circle(output, center, 5, (0, 0, 255), -1)
+    cv2.putText(output, "Center", (cX + 10, cY), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+    cv2.circle(output, center, int(avg_distance), (255, 0, 255), 1)
+    cv2.circle(output, center, int(max_distance), (255, 0, 0), 1)
+    return center, max_distance, avg_distance, output
+
+
+def detect_circles(gray, label):
+    """
+    Detects circles with the Hough transform.
+
+    Returns:
+        results: list of (label, index, x, y, radius)
+        output: BGR visualization
+    """
+    import cv2
+
+    # Apply Gaussian blur to reduce noise
+    blurred = cv2.GaussianBlur(gray, (9, 9), 2)
+
+    circles = cv2.HoughCircles(
+        blurred,
+        cv2.HOUGH_GRADIENT,
+        dp=1.2,
+        minDist=50,
+        param1=50,
+        param2=30,
+        minRadius=10,
+        maxRadius=100
+    )
+
+    output = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+    results = []
+
+    if circles is not None:
+        circles = np.round(circles[0, :]).astype("int")
+        for i, (x, y, r) in enumerate(circles):
+            cv2.circle(output, (x, y), r, (0, 255, 0), 2)
+            cv2.rectangle(output, (x - 2, y - 2), (x + 2, y + 2), (0, 128, 255), -1)
+            cv2.putText(output, str(i + 1), (x + 5, y - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            results.append((label, i + 1, x, y, r))
+            print(f"{label} Circle {i+1}: Center = ({x}, {y}), Radius = {r}")
+    else:
+        print(f"No circles detected in {label} image.")
+
+    return results, output
@@ -0,0 +1,143 @@
+"""
+Batched homography estimation for many correspondence sets at once.
+
+Each set (typically one calibration depth) is solved with the normalized DLT:
+points are translated and scaled per set (Hartley normalization), the 2N x 9
+design matrices of all sets are stacked, and one batched SVD yields every
+homography. Optional RANSAC draws minimal samples for all sets and iterations
+together, then refits each set on its inliers.
+
+Sets may have different numbers of points; they are padded to a common
+length and padded points carry zero weight.
+"""
+import numpy as np
+
+
+def _as_batch(point_sets):
+    """Stacks a sequence of (n_i, 2) arrays into a padded (S, N, 2) batch plus (S, N) weights."""
+    if isinstance(point_sets, np.ndarray) and point_sets.ndim == 3:
+        return point_sets.astype(np.float64), np.ones(point_sets.shape[:2])
+    sizes = [len(points) for points in point_sets]
+    batch = np.zeros((len(sizes), max(sizes), 2))
+    weights = np.zeros((len(sizes), max(sizes)))
+    for i, points in enumerate(point_sets):
+        batch[i, :sizes[i]] = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        weights[i, :sizes[i]] = 1
+    return batch, weights
+
+
+def _normalization(points, weights):
+    """Similarity transforms moving each set's centroid to 0 and its mean distance to sqrt(2)."""
+    total = np.maximum(weights.sum(axis=-1, keepdims=True), 1)
+    centroid = (points * weights[..., None]).sum(axis=-2) / total
+    dist = np.linalg.norm(points - centroid[..., None, :], axis=-1)
+    mean_dist = (dist * weights).sum(axis=-1) / total[..., 0]
+    scale = np.sqrt(2) / np.where(mean_dist > 0, mean_dist, 1)
+
+    T = np.zeros(points.shape[:-2] + (3, 3))
+    T[..., 0, 0] = scale
+    T[..., 1, 1] = scale
+    T[..., 0, 2] = -scale * centroid[..., 0]
+    T[..., 1, 2] = -scale * centroid[..., 1]
+    T[..., 2, 2] = 1
+    return T
+
+
+def _apply(T, points):
+    """Applies (..., 3, 3) transforms to (..., N, 2) points."""
+    mapped = points @ T[..., :2, :2].swapaxes(-1, -2) + T[..., None, :2, 2]
+    w = points @ T[..., 2, :2][..., :, None] + T[..., None, 2, 2:3]
+    return mapped / w
+
+
+def dlt(src, dst, weights=None):
+    """
+    Solves the normalized DLT for a batch of correspondence sets.
+
+    Args:
+        src, dst: (..., N, 2) corresponding points
+        weights: optional (..., N) point weights; zero excludes a point
+
+    Returns:
+        (..., 3, 3) homographies mapping src to dst, scaled so H33 = 1
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    if weights is None:
+        weights = np.ones(src.shape[:-1])
+
+    T_src = _normalization(src, weights)
+    T_dst = _normalization(dst, weights)
+    s = _apply(T_src, src)
+    d = _apply(T_dst, dst)
+    x, y = s[..., 0], s[..., 1]
+    u, v = d[..., 0], d[..., 1]
+    zero = np.zeros_like(x)
+    one = np.ones_like(x)
+
+    # Two rows per correspondence, weighted so excluded points vanish
+    rows_u = np.stack([-x, -y, -one, zero, zero, zero, u * x, u * y, u], axis=-1)
+    rows_v = np.stack([zero, zero, zero, -x, -y, -one, v * x, v * y, v], axis=-1)
+    A = np.concatenate([rows_u, rows_v], axis=-2) * np.concatenate([weights, weights], axis=-1)[..., None]
+    if A.shape[-2] < 9:
+        pad = np.zeros(A.shape[:-2] + (9 - A.shape[-2], 9))
+        A = np.concatenate([A, pad], axis=-2)
+
+    _, _, Vt = np.linalg.svd(A, full_matrices=False)
+    H_norm = Vt[..., -1, :].reshape(A.shape[:-2] + (3, 3))
+    H = np.linalg.inv(T_dst) @ H_norm @ T_src
+    return H / H[..., 2:3, 2:3]
+
+
+def reprojection_error(H, src, dst):
+    """Returns the per-point distance between H(src) and dst, shape (..., N)."""
+    return np.linalg.norm(_apply(H, np.asarray(src, dtype=np.float64)) - dst, axis=-1)
+
+
+def estimate_homographies(src_sets, dst_sets, ransac=False, threshold=3.0, iterations=200, seed=None):
+    """
+    Estimates one homography per correspondence set.
+
+    Args:
+        src_sets, dst_sets: sequences of (n_i, 2) arrays, or (S, N, 2) arrays
+        ransac (bool): reject outliers before the final fit
+        threshold (float): RANSAC inlier distance in dst pixels
+        iterations (int): RANSAC minimal samples drawn per set
+        seed: seed for the RANSAC sampler
+
+    Returns:
+        np.ndarray of shape (S, 3, 3)
+    """
+    src, weights = _as_batch(src_sets)
+    dst, _ = _as_batch(dst_sets)
+    if src.shape != dst.shape:
+        raise ValueError("src and dst sets must have matching point counts")
+    if (weights.sum(axis=-1) < 4).any():
+        raise ValueError("every set needs at least 4 correspondences")
+
+    if ransac:
+        weights = _ransac_inliers(src, dst, weights, threshold, iterations, np.random.default_rng(seed))
+    return dlt(src, dst, weights)
+
+
+def _ransac_inliers(src, dst, weights, threshold, iterations, rng):
+    """Returns (S, N) weights keeping the best consensus set of every correspondence set."""
+    num_sets, num_points = weights.shape
+
+    # Draw 4 distinct valid indices per set and iteration; valid points come first
+    keys = rng.random((iterations, num_sets, num_points))
+    keys[:, weights == 0] = np.inf
+    sample = np.argsort(keys, axis=-1)[..., :4]
+
+    sets = np.arange(num_sets)[None, :, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H = dlt(src[sets, sample], dst[sets, sample])
+        errors = reprojection_error(H, src[None], dst[None])
+    inliers = (errors < threshold) & (weights[None] > 0)
+    best = np.argmax(inliers.sum(axis=-1), axis=0)
+    best_inliers = inliers[best, np.arange(num_sets)]
+
+    # Fall back to all points where no sample reached a minimal consensus
+    too_few = best_inliers.sum(axis=-1) < 4
+    best_inliers[too_few] = weights[too_few] > 0
+    return best_inliers.astype(np.float64)
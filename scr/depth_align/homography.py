@@ -0,0 +1,94 @@
+"""
+Depth-dependent homography model.
+
+Each element of the 3x3 homography is modelled as a linear function of depth,
+H_ij(d) = a_ij + b_ij * d, with d in cm. Coefficients are stored as dicts
+mapping element names ('H11' ... 'H33') to (a, b) tuples.
+"""
+import re
+
+import numpy as np
+
+# Names of the homography elements in row-major order
+ELEMENTS = [f"H{i // 3 + 1}{i % 3 + 1}" for i in range(9)]
+
+# Homography coefficients (IR -> ToF) as functions of depth
+IR_COEFFS = {
+    'H11': (1.07204, -0.00005), 'H12': (-0.10841, -0.00062), 'H13': (157.342, 0.084),
+    'H21': (0.02877, 0.00004),  'H22': (0.96821, -0.00071), 'H23': (51.135, 0.227),
+    'H31': (0.00008, 0.0000003),'H32': (-0.00041, -0.0000017), 'H33': (1.0, 0.0)
+}
+
+# Homography coefficients (RGB -> ToF) as functions of depth
+RGB_COEFFS = {
+    'H11': (0.26969, 0.00031), 'H12': (0.00174, -0.00031), 'H13': (172.811, 0.025),
+    'H21': (-0.03179, 0.00021), 'H22': (0.31907, -0.00017), 'H23': (110.336, 0.167),
+    'H31': (-0.00016, 0.0000009), 'H32': (0.000014, -0.0000009), 'H33': (1.0, 0.0)
+}
+
+LINE_PATTERN = re.compile(r"(H\d\d)\(d\) = (\S+) \+ (\S+) \* d")
+
+
+def get_H(coeffs, d_cm):
+    """Computes the homography matrix H for a single depth in cm."""
+    return np.array([
+        [coeffs['H11'][0] + coeffs['H11'][1]*d_cm, coeffs['H12'][0] + coeffs['H12'][1]*d_cm, coeffs['H13'][0] + coeffs['H13'][1]*d_cm],
+        [coeffs['H21'][0] + coeffs['H21'][1]*d_cm, coeffs['H22'][0] + coeffs['H22'][1]*d_cm, coeffs['H23'][0] + coeffs['H23'][1]*d_cm],
+        [coeffs['H31'][0] + coeffs['H31'][1]*d_cm, coeffs['H32'][0] + coeffs['H32'][1]*d_cm, coeffs['H33'][0]]
+    ])
+
+
+def homography_stack(coeffs, d_cm, dtype=np.float64):
+    """
+    Evaluates the linear depth model H(d) for an array of depths.
+
+    Returns:
+        np.ndarray of shape (len(d_cm), 3, 3) and the given dtype
+    """
+    d_cm = np.asarray(d_cm, dtype=dtype)
+    H = np.empty((len(d_cm), 9), dtype=dtype)
+    for i, name in enumerate(ELEMENTS[:8]):
+        a, b = coeffs[name]
+        H[:, i] = a + b * d_cm
+    H[:, 8] = coeffs['H33'][0]
+    return H.reshape(-1, 3, 3)
+
+
+def fit_linear_model(depths, H_stack):
+    """
+    Fits H_ij(d) = a + b * d for every element from homographies at known depths.
+
+    Args:
+        depths: sequence of depths in cm
+        H_stack: homographies of shape (len(depths), 3, 3)
+
+    Returns:
+        dict of (a, b) coefficients per element
+    """
+    H_flat = np.asarray(H_stack, dtype=float).reshape(len(depths), 9)
+    coeffs = np.polyfit(np.asarray(depths, dtype=float), H_flat, 1)  # shape: (2, 9) -> [b, a]
+    return {name: (coeffs[1, i], coeffs[0, i]) for i, name in enumerate(ELEMENTS)}
+
+
+def write_linear_model(coeffs, file_path, title=None):
+    """Writes coefficients as one 'Hij(d) = a + b * d' line per element."""
+    with open(file_path, "w") as f:
+        if title:
+            f.write(f"### {title} ###\n")
+        for name in ELEMENTS:
+            a, b = coeffs[name]
+            f.write(f"{name}(d) = {a:.10f} + {b:.10f} * d\n")
+
+
+def read_linear_model(file_path):
+    """Reads coefficients written by write_linear_model."""
+    coeffs = {}
+    with open(file_path, "r") as f:
+        for line in f:
+            match = LINE_PATTERN.match(line.strip())
+            if match:
+                coeffs[match.group(1)] = (float(match.group(2)), float(match.group(3)))
+    missing = set(ELEMENTS) - set(coeffs)
+    if missing:
+        raise ValueError(f"{file_path}: missing elements {sorted(missing)}")
+    return coeffs
@@ -0,0 +1,174 @@
+"""
+Direct depth model of the inverse homography.
+
+The runtime maps ToF pixels into IR/RGB with H(d)^-1, which would otherwise be
+inverted per pixel. Here G(d) ~ H(d)^-1 (scaled so G33 = 1) is sampled over
+the calibrated depth range and each element is fitted with a low-order
+polynomial in d. Projection then needs only the polynomial evaluation, one
+mat-vec and a divide per pixel.
+
+Inverse models are dicts mapping 'G11' ... 'G33' to polynomial coefficients in
+ascending order, (c0, c1, ..., ck) for G_ij(d) = c0 + c1 * d + ... + ck * d^k,
+and 'range' to the fitted (d_min, d_max) in cm. The polynomials are only
+accurate over that range; depths outside it, including the zero depth of
+pixels without a measurement, are projected with the exact H(d)^-1 instead.
+"""
+import re
+
+import numpy as np
+
+from .homography import homography_stack
+
+# Names of the inverse homography elements in row-major order
+INVERSE_ELEMENTS = [f"G{i // 3 + 1}{i % 3 + 1}" for i in range(9)]
+
+LINE_PATTERN = re.compile(r"(G\d\d)\(d\) = (.+)")
+RANGE_PATTERN = re.compile(r"d in \[(\S+), (\S+)\] cm")
+TERM_PATTERN = re.compile(r"(\S+?)(?: \* d(?:\^(\d+))?)?$")
+
+
+def exact_inverse(coeffs, d_cm):
+    """Inverts H(d) for an array of depths, scaled so G33 = 1. Shape (N, 3, 3)."""
+    G = np.linalg.inv(homography_stack(coeffs, d_cm))
+    return G / G[:, 2:3, 2:3]
+
+
+def fit_inverse_model(coeffs, d_min, d_max, degree=2, samples=64):
+    """
+    Fits a polynomial model of H(d)^-1 over [d_min, d_max] cm.
+
+    Returns:
+        dict of ascending polynomial coefficients per element, plus the range
+    """
+    depths = np.linspace(d_min, d_max, max(samples, degree + 1))
+    G = exact_inverse(coeffs, depths).reshape(-1, 9)
+    poly = np.polyfit(depths, G, degree)[::-1]  # shape: (degree + 1, 9), ascending
+    inverse = {name: tuple(float(c) for c in poly[:, i]) for i, name in enumerate(INVERSE_ELEMENTS)}
+    inverse["range"] = (float(d_min), float(d_max))
+    return inverse
+
+
+def inverse_covers(inverse, d_cm):
+    """
+    Returns a mask of the depths inside the fitted range of an inverse model.
+
+    Models without a stored range (written before it was recorded) cover
+    every depth.
+    """
+    d_min, d_max = inverse.get("range", (-np.inf, np.inf))
+    return (d_cm >= d_min) & (d_cm <= d_max)
+
+
+def inverse_elements(inverse, d_cm):
+    """
+    Evaluates the inverse model for an array of depths.
+
+    Float32 depths are evaluated in float32, anything else in float64.
+
+    Returns:
+        np.ndarray of shape (9, N), one row per element
+    """
+    d_cm = np.asarray(d_cm)
+    if d_cm.dtype != np.float32:
+        d_cm = d_cm.astype(np.float64)
+    out = np.empty((9,) + d_cm.shape, dtype=d_cm.dtype)
+    for i, name in enumerate(INVERSE_ELEMENTS):
+        value = np.zeros_like(d_cm)
+        for c in reversed(inverse[name]):  # Horner's scheme
+            value = value * d_cm + c
+        out[i] = value
+    return out
+
+
+def project_with_inverse(inverse, d_cm, rows, cols):
+    """
+    Maps ToF pixels (1-based rows/cols) with the inverse model.
+
+    The model is evaluated at every depth, inside its range or not; see
+    sparse.project_coordinates for the exact fallback.
+
+    Returns:
+        x, y: unrounded target coordinates
+    """
+    g11, g12, g13, g21, g22, g23, g31, g32, g33 = inverse_elements(inverse, d_cm)
+    w = g31 * cols + g32 * rows + g33
+    x = (g11 * cols + g12 * rows + g13) / w
+    y = (g21 * cols + g22 * rows + g23) / w
+    return x, y
+
+
+def validate_inverse_model(coeffs, inverse, d_min, d_max, size=(640, 480), samples=16, step=8):
+    """
+    Compares the inverse model with the exact inverse over the depth range.
+
+    ToF pixels on a grid with the given step are projected at `samples`
+    depths in [d_min, d_max] with both H(d)^-1 and the model.
+
+    Returns:
+        max_error, mean_error (float): distance in target pixels
+    """
+    width, height = size
+    rows, cols = np.mgrid[1:height + 1:step, 1:width + 1:step]
+    rows, cols = rows.ravel().astype(float), cols.ravel().astype(float)
+    pts = np.stack([cols, rows, np.ones_like(rows)])
+
+    max_error, total, count = 0.0, 0.0, 0
+    for d in np.linspace(d_min, d_max, samples):
+        exact = exact_inverse(coeffs, [d])[0] @ pts
+        x_exact, y_exact = exact[:2] / exact[2]
+        x, y = project_with_inverse(inverse, np.full_like(rows, d), rows, cols)
+        error = np.hypot(x - x_exact, y - y_exact)
+        max_error = max(max_error, float(error.max()))
+        total += float(error.sum())
+        count += error.size
+    return max_error, total / count
+
+
+def write_inverse_model(inverse, file_path, title=None):
+    """Writes one 'Gij(d) = c0 + c1 * d + c2 * d^2 ...' line per element."""
+    with open(file_path, "w") as f:
+        if title:
+            f.write(f"### {title} ###\n")
+        if "range" in inverse:
+            f.write("d in [{:g}, {:g}] cm\n".format(*inverse["range"]))
+        for name in INVERSE_ELEMENTS:
+            terms = [f"{c:.12e}" + ("" if k == 0 else " * d" if k == 1 else f" * d^{k}")
+                     for k, c in enumerate(inverse[name])]
+            f.write(f"{name}(d) = {' + '.join(terms)}\n")
+
+
+def read_inverse_model(file_path):
+    """Reads a model written by write_inverse_model."""
+    inverse = {}
+    with open(file_path, "r") as f:
+        for line in f:
+            match = RANGE_PATTERN.match(line.strip())
+            if match:
+                inverse["range"] = (float(match.group(1)), float(match.group(2)))
+                continue
+            match = LINE_PATTERN.match(line.strip())
+            if not match:
+                continue
+            poly = {}
+            for term in match.group(2).split(" + "):
+                value, power = TERM_PATTERN.match(term.strip()).groups()
+                k = int(power) if power else (1 if "* d" in term else 0)
+                poly[k] = float(value)
+            inverse[match.group(1)] = tuple(poly.get(k, 0.0) for k in range(max(poly) + 1))
+    missing = set(INVERSE_ELEMENTS) - set(inverse)
+    if missing:
+        raise ValueError(f"{file_path}: missing elements {sorted(missing)}")
+    return inverse
+
+
+def export_inverse_model(coeffs, d_min, d_max, file_path, degree=2, title=None):
+    """
+    Fits, validates and writes the inverse model for a depth range.
+
+    Returns:
+        inverse model, max_error, mean_error
+    """
+    inverse = fit_inverse_model(coeffs, d_min, d_max, degree)
+    max_error, mean_error = validate_inverse_model(coeffs, inverse, d_min, d_max)
+    write_inverse_model(inverse, file_path, title)
+    return inverse, max_error, mean_error
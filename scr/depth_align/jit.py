@@ -0,0 +1,156 @@
+"""
+Numba-compiled CPU kernels for the per-pixel stages of the pipeline.
+
+These mirror the NumPy reference implementations in depth.py and
+pipeline.py: edge-aware interpolation, dense projection through H(d)^-1
+with clipping, and the IR splat into the RGB frame. The kernels loop over
+pixels directly instead of building window or matrix temporaries, and the
+interpolation and projection loops run in parallel. Float32 depth maps get
+their own compiled specializations that read and write float32 arrays.
+
+This module imports numba at import time; pipeline.py only imports it when
+the numba backend is selected and installed.
+"""
+import numba
+import numpy as np
+
+from .homography import ELEMENTS
+
+
+@numba.njit(parallel=True, cache=True)
+def _interpolate(padded, z_map, spatial_weights, depth_sigma, output):
+    height, width = z_map.shape
+    k = spatial_weights.shape[0]
+    denom = 2 * depth_sigma ** 2
+    for r in numba.prange(height):
+        for c in range(width):
+            center = z_map[r, c]
+            if center == 0:
+                output[r, c] = 0
+                continue
+
+            if np.isnan(center):
+                total = 0.0
+                n = 0
+                for i in range(k):
+                    for j in range(k):
+                        v = padded[r + i, c + j]
+                        if not np.isnan(v):
+                            total += v
+                            n += 1
+                center = total / n if n > 0 else 0.0
+
+            weight_sum = 0.0
+            value_sum = 0.0
+            for i in range(k):
+                for j in range(k):
+                    v = padded[r + i, c + j]
+                    if np.isnan(v):
+                        continue
+                    w = spatial_weights[i, j] * np.exp(-((v - center) ** 2) / denom)
+                    weight_sum += w
+                    value_sum += v * w
+            output[r, c] = value_sum / weight_sum if weight_sum > 0 else center
+
+
+@numba.njit(parallel=True, cache=True)
+def _project(z, width, coeffs, w, h, out):
+    for p in numba.prange(z.shape[0]):
+        row = p // width + 1
+        col = p % width + 1
+        d = -z[p] / 10.0 if z[p] != 0 else 0.0
+
+        h11 = coeffs[0, 0] + coeffs[0, 1] * d
+        h12 = coeffs[1, 0] + coeffs[1, 1] * d
+        h13 = coeffs[2, 0] + coeffs[2, 1] * d
+        h21 = coeffs[3, 0] + coeffs[3, 1] * d
+        h22 = coeffs[4, 0] + coeffs[4, 1] * d
+        h23 = coeffs[5, 0] + coeffs[5, 1] * d
+        h31 = coeffs[6, 0] + coeffs[6, 1] * d
+        h32 = coeffs[7, 0] + coeffs[7, 1] * d
+        h33 = coeffs[8, 0]
+
+        # Adjugate rows of H; the determinant cancels in the perspective divide
+        x = (h22 * h33 - h23 * h32) * col + (h13 * h32 - h12 * h33) * row + (h12 * h23 - h13 * h22)
+        y = (h23 * h31 - h21 * h33) * col + (h11 * h33 - h13 * h31) * row + (h13 * h21 - h11 * h23)
+        s = (h21 * h32 - h22 * h31) * col + (h12 * h31 - h11 * h32) * row + (h11 * h22 - h12 * h21)
+
+        out[p, 0] = min(max(np.rint(x / s), 0), w - 1)
+        out[p, 1] = min(max(np.rint(y / s), 0), h - 1)
+
+
+@numba.njit(cache=True)
+def _splat(ir_xy, rgb_xy, ir_img, ir_w, ir_h, warped, mask):
+    # Sequential so that later mapping entries win collisions, as in the reference
+    rgb_h, rgb_w = mask.shape
+    for p in range(ir_xy.shape[0]):
+        ir_x, ir_y = ir_xy[p, 0], ir_xy[p, 1]
+        rgb_x, rgb_y = rgb_xy[p, 0], rgb_xy[p, 1]
+        if 0 <= rgb_x < rgb_w and 0 <= rgb_y < rgb_h and 0 <= ir_x < ir_w and 0 <= ir_y < ir_h:
+            warped[rgb_y, rgb_x] = ir_img[ir_y, ir_x]
+            mask[rgb_y, rgb_x] = True
+
+
+def _coeff_array(coeffs, dtype=np.float64):
+    return np.array([coeffs[name] for name in ELEMENTS], dtype=dtype)
+
+
+def _float_dtype(array):
+    """float32 arrays stay float32 (the reduced-precision path); anything else is float64."""
+    return np.float32 if array.dtype == np.float32 else np.float64
+
+
+def edge_aware_interpolation(z_map, spatial_sigma=1.0, depth_sigma=0.1, window_size=3, out=None):
+    """Compiled equivalent of depth.edge_aware_interpolation."""
+    z_map = np.ascontiguousarray(z_map, dtype=_float_dtype(z_map))
+    padded = np.pad(z_map, pad_width=window_size//2, mode='reflect')
+    grid = np.arange(window_size) - window_size // 2
+    yy, xx = np.meshgrid(grid, grid)
+    spatial_weights = np.exp(-(xx**2 + yy**2) / (2 * spatial_sigma**2)).astype(z_map.dtype)
+    output = np.empty_like(z_map) if out is None else out
+    _interpolate(padded, z_map, spatial_weights, float(depth_sigma), output)
+    return output
+
+
+def project(z_filled, coeffs, size, out=None):
+    """
+    Projects every pixel of a depth grid through H(d)^-1 into a target image.
+
+    Returns:
+        np.ndarray of shape (H * W, 2), int64 (x, y) clipped to the image;
+        `out` when given
+    """
+    dtype = _float_dtype(z_filled)
+    z = np.ascontiguousarray(z_filled, dtype=dtype).ravel()
+    if out is None:
+        out = np.empty((z.size, 2), dtype=np.int64)
+    _project(z, z_filled.shape[1], _coeff_array(coeffs, dtype), size[0], size[1], out)
+    return out
+
+
+def splat(ir_xy, rgb_xy, ir_img, ir_size, warped_ir, mask):
+    """Writes IR values at ir_xy into warped_ir at rgb_xy and marks them in mask."""
+    _splat(np.ascontiguousarray(ir_xy, dtype=np.int64), np.ascontiguousarray(rgb_xy, dtype=np.int64),
+           np.ascontiguousarray(ir_img), ir_size[0], ir_size[1], warped_ir, mask)
+
+
+def dense_mapping(z_filled, ir_coeffs, rgb_coeffs, ir_size, rgb_size):
+    """Compiled equivalent of pipeline.dense_mapping."""
+    height, width = z_filled.shape
+    ir_xy = project(z_filled, ir_coeffs, ir_size)
+    rgb_xy = project(z_filled, rgb_coeffs, rgb_size)
+
+    rows, cols = np.indices((height, width))
+    z = z_filled.ravel()
+    return np.column_stack([rows.ravel() + 1, cols.ravel() + 1, z, ir_xy, rgb_xy]).astype(float)
+
+
+def warp_ir_to_rgb(mapping, ir_img, ir_size, rgb_size, shape=None):
+    """Compiled equivalent of pipeline.warp_ir_to_rgb."""
+    rgb_w, rgb_h = rgb_size
+    shape = tuple(shape) if shape is not None else (rgb_h, rgb_w)
+    warped_ir = np.zeros(shape, dtype=ir_img.dtype)
+    mask = np.zeros(shape, dtype=bool)
+    coords = mapping[:, 3:7].astype(np.int64)
+    splat(coords[:, :2], coords[:, 2:], ir_img, ir_size, warped_ir, mask)
+    return warped_ir, mask
@@ -0,0 +1,225 @@
+"""
+Loads ToF depth, IR and RGB captures for the alignment pipeline.
+
+The three files of a capture are decoded concurrently on a thread pool, and
+FrameLoader keeps a bounded number of upcoming captures decoding in the
+background while the current one is processed. Images are handed out in
+their native layout: RGB stays (H, W, 3) uint8 and IR stays single-channel.
+"""
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+# ToF sensor dimensions
+WIDTH, HEIGHT = 640, 480
+
+# Default file names inside a capture folder
+PLY_NAME = "blaze.ply"
+IR_NAME = "ir.tif"
+RGB_NAME = "rgb.tif"
+
+# One decoded capture: depth (H, W) float32 in mm, IR (h, w), RGB (h, w, 3)
+Frame = namedtuple("Frame", ["depth", "ir", "rgb"])
+
+# PLY scalar types mapped to little-endian numpy types
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "<i2", "int16": "<i2", "ushort": "<u2", "uint16": "<u2",
+    "int": "<i4", "int32": "<i4", "uint": "<u4", "uint32": "<u4",
+    "float": "<f4", "float32": "<f4", "double": "<f8", "float64": "<f8",
+}
+
+
+def read_ply_header(file_path):
+    """
+    Parses the header of a binary little-endian PLY file.
+
+    Returns:
+        data_start (int): byte offset where the binary body begins
+        elements (list): (name, count, properties) for each element, where
+            properties is a list of (name, type) or (name, count_type, item_type)
+            for list properties
+    """
+    elements = []
+    with open(file_path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{file_path}: missing end_header")
+            words = line.decode('ascii', 'replace').split()
+            if not words:
+                continue
+            if words[0] == 'end_header':
+                return f.tell(), elements
+            if words[0] == 'format' and words[1] != 'binary_little_endian':
+                raise ValueError(f"{file_path}: unsupported PLY format {words[1]}")
+            if words[0] == 'element':
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == 'property' and elements:
+                if words[1] == 'list':
+                    elements[-1][2].append((words[4], words[2], words[3]))
+                else:
+                    elements[-1][2].append((words[2], words[1]))
+
+
+def read_ply_depth(file_path, width=WIDTH, height=HEIGHT):
+    """
+    Reads the z coordinate of every ToF pixel from a Blaze PLY file.
+
+    Organized clouds store one vertex per pixel in row-major order. Clouds
+    saved with a range_grid element store only measured vertices, plus one
+    index list per pixel; pixels without a vertex are returned as NaN.
+
+    Returns:
+        np.ndarray of shape (height, width), float32, depth in mm
+    """
+    data_start, elements = read_ply_header(file_path)
+    with open(file_path, 'rb') as f:
+        f.seek(data_start)
+        body = f.read()
+
+    offset = 0
+    vertices = None
+    grid = None
+    for name, count, properties in elements:
+        if name == 'vertex':
+            dtype = np.dtype([(prop[0], PLY_TYPES[prop[1]]) for prop in properties])
+            vertices = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+        elif name == 'range_grid':
+            grid = _read_range_grid(body, offset, count)
+        elif count:
+            raise ValueError(f"{file_path}: cannot skip non-empty element '{name}'")
+
+    z_map = np.full(width * height, np.nan, dtype=np.float32)
+    if grid is None:
+        n = min(len(vertices), z_map.size)
+        z_map[:n] = vertices['z'][:n]
+    else:
+        has_vertex = grid >= 0
+        z_map[:len(grid)][has_vertex] = vertices['z'][grid[has_vertex]]
+    return z_map.reshape(height, width)
+
+
+def _read_range_grid(body, offset, count):
+    """
+    Decodes a range_grid element (list uchar int) into one vertex index per
+    pixel, or -1 where the pixel has no vertex.
+    """
+    raw = np.frombuffer(body, dtype=np.uint8, offset=offset)
+    size = len(raw)
+    # A record at byte p is a count n followed by n int32 indices, so the next
+    # record starts at p + 1 + 4 * n. The record starts form a chain through
+    # the bytes; pointer doubling enumerates it in log2(count) array steps.
+    jump = np.minimum(np.arange(1, size + 1) + 4 * raw.astype(np.int64), size)
+    jump = np.append(jump, size)  # position `size` is a sentinel pointing to itself
+    starts = np.zeros(1, dtype=np.int64)
+    while len(starts) < count:
+        starts = np.concatenate([starts, jump[starts]])
+        if len(starts) < count:
+            jump = jump[jump]
+    starts = starts[:count]
+    if count and starts[-1] >= size:
+        raise ValueError("range_grid element is truncated")
+
+    index = np.full(count, -1, dtype=np.int64)
+    has_vertex = np.flatnonzero(raw[starts] > 0)
+    first = starts[has_vertex, None] + 1 + np.arange(4)
+    index[has_vertex] = raw[first].view("<i4").ravel()
+    return index
+
+
+def read_image_shape(file_path):
+    """Returns the (rows, cols) of an image without decoding its pixels."""
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return img.height, img.width
+
+
+def read_rgb(file_path):
+    """Loads an RGB image as an (H, W, 3) uint8 array, converting only if needed."""
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        return np.asarray(img)
+
+
+def read_ir(file_path):
+    """Loads an IR image as a single-channel array in its native bit depth."""
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        if img.mode in ("RGB", "RGBA", "P", "LA"):
+            img = img.convert("L")
+        return np.asarray(img)
+
+
+def find_captures(root, name=PLY_NAME):
+    """Returns the folders below root that contain a capture file, sorted."""
+    return sorted(folder for folder, _, files in os.walk(root) if name in files)
+
+
+def _submit_frame(executor, folder, width, height, names):
+    ply_name, ir_name, rgb_name = names
+    return (
+        executor.submit(read_ply_depth, os.path.join(folder, ply_name), width, height),
+        executor.submit(read_ir, os.path.join(folder, ir_name)),
+        executor.submit(read_rgb, os.path.join(folder, rgb_name)),
+    )
+
+
+def _collect_frame(futures):
+    return Frame(*(future.result() for future in futures))
+
+
+def load_frame(folder=".", width=WIDTH, height=HEIGHT, names=(PLY_NAME, IR_NAME, RGB_NAME)):
+    """
+    Loads one capture folder, decoding depth, IR and RGB concurrently.
+
+    Returns:
+        Frame(depth, ir, rgb)
+    """
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        return _collect_frame(_submit_frame(executor, folder, width, height, names))
+
+
+class FrameLoader:
+    """
+    Iterates over capture folders while prefetching the next ones.
+
+    Up to `prefetch` captures are decoding or decoded ahead of the consumer,
+    each with its three files read in parallel. Iteration yields Frame tuples
+    in folder order; read errors are raised when their frame is reached.
+    """
+
+    def __init__(self, folders, prefetch=2, width=WIDTH, height=HEIGHT,
+                 names=(PLY_NAME, IR_NAME, RGB_NAME), max_workers=None):
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1")
+        self.folders = list(folders)
+        self.prefetch = prefetch
+        self.width = width
+        self.height = height
+        self.names = names
+        self.max_workers = max_workers or 3 * prefetch
+
+    def __len__(self):
+        return len(self.folders)
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = deque()
+        try:
+            for folder in self.folders:
+                pending.append(_submit_frame(executor, folder, self.width, self.height, self.names))
+                if len(pending) > self.prefetch:
+                    yield _collect_frame(pending.popleft())
+            while pending:
+                yield _collect_frame(pending.popleft())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
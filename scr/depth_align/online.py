@@ -0,0 +1,145 @@
+"""
+Online recalibration of the linear depth-homography model.
+
+Instead of refitting H(d) = a + b * d from scratch, OnlineCalibration keeps
+the sufficient statistics of the per-element least-squares line fit:
+
+    S0 = sum(w), S1 = sum(w * d), S2 = sum(w * d^2),
+    Sh = sum(w * H), Sdh = sum(w * d * H)
+
+Folding in a capture updates these sums in constant time, and the
+coefficients follow in closed form. A forgetting factor below 1 discounts
+older captures (exponentially weighted recursive least squares), so the model
+tracks slow drift such as thermal changes of the rig.
+"""
+import hashlib
+import threading
+
+import numpy as np
+
+from .homography import ELEMENTS
+
+
+class OnlineCalibration:
+    """
+    Incrementally fitted linear depth-homography model for one camera pair.
+
+    The current coefficients are available as `coeffs` and are replaced as a
+    whole on every update, so a running aligner that reads them once per frame
+    always sees a consistent model. Callbacks registered with subscribe are
+    called with the new coefficients after each update.
+
+    Homographies follow the runtime convention of IR_COEFFS and RGB_COEFFS:
+    they map camera pixels (IR or RGB) to ToF pixels.
+    """
+
+    def __init__(self, initial=None, forgetting=1.0):
+        """
+        Args:
+            initial: coefficient dict used until two distinct depths are seen
+            forgetting (float): weight multiplier applied to past captures on
+                every update, in (0, 1]
+        """
+        if not 0 < forgetting <= 1:
+            raise ValueError("forgetting must be in (0, 1]")
+        self.forgetting = forgetting
+        self._stats = np.zeros(3)            # S0, S1, S2
+        self._sums = np.zeros((2, 9))        # Sh, Sdh
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self.folded = set()                  # keys of captures already folded in
+        self.coeffs = dict(initial) if initial is not None else None
+        self.version = 0
+
+    def add_homography(self, depth, H, weight=1.0):
+        """Folds in one homography measured at depth (cm)."""
+        h = np.asarray(H, dtype=np.float64).reshape(9)
+        h = h / h[8]
+        with self._lock:
+            self._stats *= self.forgetting
+            self._sums *= self.forgetting
+            self._stats += weight * np.array([1.0, depth, depth * depth])
+            self._sums[0] += weight * h
+            self._sums[1] += weight * depth * h
+            coeffs = self._solve()
+            if coeffs is not None:
+                self.coeffs = coeffs
+                self.version += 1
+        if coeffs is not None:
+            for callback in list(self._subscribers):
+                callback(coeffs)
+        return self.coeffs
+
+    def add_capture(self, depth, src_corners, dst_corners, ransac=False):
+        """
+        Estimates the homography of one chessboard capture and folds it in.
+
+        src_corners are the camera (IR or RGB) corners and dst_corners the
+        matching ToF corners. Captures are identified by their depth and corners. A capture that was
+        already folded in, possibly before a save/load, is skipped, so
+        replaying a dataset does not count it twice.
+
+        Returns:
+            True if the capture was folded in, False if it was skipped
+        """
+        from .estimation import estimate_homographies
+
+        key = capture_key(depth, src_corners, dst_corners)
+        if key in self.folded:
+            return False
+        H = estimate_homographies([src_corners], [dst_corners], ransac=ransac)[0]
+        self.add_homography(depth, H)
+        self.folded.add(key)
+        return True
+
+    def subscribe(self, callback):
+        """Registers callback(coeffs), called after every successful update."""
+        self._subscribers.append(callback)
+
+    def _solve(self):
+        S0, S1, S2 = self._stats
+        det = S0 * S2 - S1 * S1
+        if S0 <= 0 or det <= 1e-12 * S0 * S2:
+            return None  # fewer than two distinct depths
+        Sh, Sdh = self._sums
+        b = (S0 * Sdh - S1 * Sh) / det
+        a = (Sh - b * S1) / S0
+        return {name: (float(a[i]), float(b[i])) for i, name in enumerate(ELEMENTS)}
+
+    def save(self, file_path):
+        """Stores the sufficient statistics so updates can continue later."""
+        np.savez(file_path, stats=self._stats, sums=self._sums, forgetting=self.forgetting,
+                 folded=np.array(sorted(self.folded), dtype="U64"))
+
+    @classmethod
+    def load(cls, file_path, initial=None):
+        """Restores a model saved with save."""
+        with np.load(file_path, allow_pickle=False) as data:
+            model = cls(initial, float(data["forgetting"]))
+            model._stats = data["stats"].astype(np.float64)
+            model._sums = data["sums"].astype(np.float64)
+            if "folded" in data.files:
+                model.folded = set(data["folded"].tolist())
+        coeffs = model._solve()
+        if coeffs is not None:
+            model.coeffs = coeffs
+        return model
+
+
+def capture_key(depth, src_corners, dst_corners):
+    """Identifies a capture by its depth and corner coordinates."""
+    digest = hashlib.sha256(np.float64(depth).tobytes())
+    for corners in (src_corners, dst_corners):
+        digest.update(np.ascontiguousarray(corners, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def current_coeffs(model):
+    """Returns the coefficient dict of a static dict or an OnlineCalibration."""
+    if not isinstance(model, OnlineCalibration):
+        return model
+    coeffs = model.coeffs
+    if coeffs is None:
+        raise ValueError("online calibration has no model yet: fold in captures at two distinct depths "
+                         "or give it initial coefficients")
+    return coeffs
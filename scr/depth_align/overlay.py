@@ -0,0 +1,77 @@
+"""
+Overlay of Blaze, IR and RGB chessboard captures at a single static depth.
+
+IR and RGB are warped into the Blaze frame with homographies estimated from
+the chessboard corners, and each modality is drawn into its own color channel.
+"""
+import os
+
+import numpy as np
+
+from .calibration import load_corners
+
+
+def overlay_images_with_corner_dots(depth, folder="."):
+    """
+    Overlay Blaze, IR, and RGB images based on chessboard corner alignment.
+    Applies homography transformations and draws matching dots in the same frame.
+
+    Args:
+        depth (int): Depth label for loading appropriate image and corner files.
+        folder (str): Folder holding the images and corner files.
+
+    Returns:
+        np.ndarray: BGR overlay image
+    """
+    import cv2
+
+    def path(name):
+        return os.path.join(folder, name)
+
+    # Load chessboard corners
+    corners_b = load_corners(path(f"blaze{depth}.txt"))
+    corners_i = load_corners(path(f"ir{depth}.txt"))
+    corners_r = load_corners(path(f"rgb{depth}.txt"))
+
+    # Load images
+    blaze = cv2.imread(path(f"blaze{depth}.tiff"))
+    ir = cv2.imread(path(f"ir{depth}.tif"))
+    rgb = cv2.cvtColor(cv2.imread(path(f"rgb{depth}.tif")), cv2.COLOR_BGR2RGB)
+
+    size = (blaze.shape[1], blaze.shape[0])  # (width, height)
+
+    # Calculate homographies to map IR and RGB to Blaze frame
+    H_ir_to_blaze, _ = cv2.findHomography(corners_i, corners_b)
+    H_rgb_to_blaze, _ = cv2.findHomography(corners_r, corners_b)
+
+    # Warp IR and RGB images
+    warped_ir = cv2.warpPerspective(ir, H_ir_to_blaze, size)
+    warped_rgb = cv2.warpPerspective(rgb, H_rgb_to_blaze, size)
+
+    # Convert to grayscale and normalize
+    blaze_gray = cv2.normalize(cv2.cvtColor(blaze, cv2.COLOR_BGR2GRAY), None, 0, 255, cv2.NORM_MINMAX)
+    ir_gray = cv2.normalize(cv2.cvtColor(warped_ir, cv2.COLOR_BGR2GRAY), None, 0, 255, cv2.NORM_MINMAX)
+    rgb_gray = cv2.normalize(cv2.cvtColor(warped_rgb, cv2.COLOR_RGB2GRAY), None, 0, 255, cv2.NORM_MINMAX)
+
+    # Create RGB-tinted grayscale layers
+    blaze_layer = cv2.merge([blaze_gray, np.zeros_like(blaze_gray), np.zeros_like(blaze_gray)])  # Red
+    ir_layer = cv2.merge([np.zeros_like(ir_gray), ir_gray, np.zeros_like(ir_gray)])              # Green
+    rgb_layer = cv2.merge([np.zeros_like(rgb_gray), np.zeros_like(rgb_gray), rgb_gray])          # Blue
+
+    # Overlay the three channels
+    overlay = cv2.addWeighted(blaze_layer, 1.0, ir_layer, 1.0, 0)
+    overlay = cv2.addWeighted(overlay, 1.0, rgb_layer, 1.0, 0)
+
+    # Transform corner points to Blaze frame
+    corners_i_to_b = cv2.perspectiveTransform(corners_i.reshape(-1, 1, 2), H_ir_to_blaze).reshape(-1, 2)
+    corners_r_to_b = cv2.perspectiveTransform(corners_r.reshape(-1, 1, 2), H_rgb_to_blaze).reshape(-1, 2)
+
+    # Draw chessboard corners on overlay
+    for pt in corners_b.astype(int):
+        cv2.circle(overlay, tuple(pt), radius=2, color=(255, 0, 0), thickness=-1)  # Blue (Blaze)
+    for pt in corners_i_to_b.astype(int):
+        cv2.circle(overlay, tuple(pt), radius=2, color=(0, 255, 0), thickness=-1)  # Green (IR)
+    for pt in corners_r_to_b.astype(int):
+        cv2.circle(overlay, tuple(pt), radius=2, color=(0, 0, 255), thickness=-1)  # Red (RGB)
+
+    return overlay
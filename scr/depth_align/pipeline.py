@@ -0,0 +1,404 @@
+"""
+Depth-aware alignment of IR onto RGB through the ToF depth map.
+
+For every ToF pixel the depth selects a homography H(d) for each camera; the
+inverse maps the pixel into IR and RGB coordinates, and IR values are then
+splatted into the RGB frame with nearest-neighbor hole filling.
+"""
+from collections import namedtuple
+import importlib.util
+import itertools
+import os
+
+import numpy as np
+
+from .depth import edge_aware_interpolation, fill_nearest, filter_outliers, reject_outliers
+from .homography import IR_COEFFS, RGB_COEFFS, get_H
+from .loader import IR_NAME, PLY_NAME, RGB_NAME, FrameLoader, load_frame
+from .online import current_coeffs
+from .sink import CHUNK_FRAMES, SequenceWriter
+from .sparse import interpolate_sparse, project_coordinates, project_points, scatter, valid_pixel_index
+
+# Image and sensor dimensions as (width, height). RGB_SIZE is the calibrated
+# extent that projected coordinates are clipped to; the warped IR takes the
+# shape of the actual RGB image, which has a few more rows.
+TOF_SIZE = (640, 480)
+IR_SIZE = (320, 240)
+RGB_SIZE = (1024, 760)
+
+# Region of the RGB frame shown in the side-by-side figure (rows, cols)
+CROP = (slice(0, 570), slice(0, 1000))
+
+# Text outputs written next to the results
+RAW_DEPTH_TXT = "row_col_z.txt"
+INTERP_DEPTH_TXT = "interpolated_z.txt"
+MAPPING_TXT = "depth_to_ir_rgb_mapping.txt"
+WARPED_IR_PNG = "warped_ir_aligned_to_rgb.png"
+SIDE_BY_SIDE_PNG = "cropped_side_by_side_ir_rgb.png"
+FUSED_NPY = "fused_rgbd_ir.npy"
+
+# Aligned outputs of one frame. `mapping` rows are
+# (row, col, depth_mm, IR_x, IR_y, RGB_x, RGB_y) with 1-based row/col.
+Alignment = namedtuple("Alignment", ["z_filled", "mapping", "warped_ir", "mask", "valid_ratio"])
+
+
+def depth_table(z_map):
+    """Flattens a depth grid into (row, col, z) rows with 1-based indices."""
+    rows, cols = np.indices(z_map.shape)
+    return np.column_stack([rows.ravel() + 1, cols.ravel() + 1, z_map.ravel()])
+
+
+def dense_mapping(z_filled, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+                  ir_size=IR_SIZE, rgb_size=RGB_SIZE):
+    """Maps each depth pixel to IR and RGB coordinates."""
+    ir_w, ir_h = ir_size
+    rgb_w, rgb_h = rgb_size
+    mapped = []
+    for row, col, z in depth_table(z_filled):
+        pt = np.array([col, row, 1])
+        d_cm = -z / 10.0 if z != 0 else 0
+
+        ir_pt = np.linalg.inv(get_H(ir_coeffs, d_cm)) @ pt
+        rgb_pt = np.linalg.inv(get_H(rgb_coeffs, d_cm)) @ pt
+        ir_pt /= ir_pt[2]
+        rgb_pt /= rgb_pt[2]
+
+        ir_x, ir_y = map(int, np.clip(np.round(ir_pt[:2]), [0, 0], [ir_w - 1, ir_h - 1]))
+        rgb_x, rgb_y = map(int, np.clip(np.round(rgb_pt[:2]), [0, 0], [rgb_w - 1, rgb_h - 1]))
+
+        mapped.append((int(row), int(col), z, ir_x, ir_y, rgb_x, rgb_y))
+    return np.array(mapped, dtype=float).reshape(-1, 7)
+
+
+def inverse_mapping(z_filled, ir_inverse, rgb_inverse, ir_size=IR_SIZE, rgb_size=RGB_SIZE,
+                    ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS):
+    """
+    Maps every depth pixel to IR and RGB coordinates using inverse models.
+
+    Depths outside a model's fitted range use the exact inverse of the
+    matching coefficients (see sparse.project_coordinates).
+    """
+    table = depth_table(z_filled)
+    rows, cols = table[:, 0], table[:, 1]
+    z = z_filled.ravel()
+    d_cm = -z / 10.0
+    ir_xy = project_points(ir_coeffs, d_cm, rows, cols, *ir_size, inverse=ir_inverse, dtype=z.dtype)
+    rgb_xy = project_points(rgb_coeffs, d_cm, rows, cols, *rgb_size, inverse=rgb_inverse, dtype=z.dtype)
+    return np.column_stack([table, ir_xy, rgb_xy])
+
+
+def warp_ir_to_rgb(mapping, ir_img, ir_size=IR_SIZE, rgb_size=RGB_SIZE, shape=None):
+    """
+    Warps IR onto the RGB image space using the pixel mapping.
+
+    Args:
+        shape: (rows, cols) of the RGB image; defaults to rgb_size
+
+    Returns:
+        warped_ir: array of IR values with the RGB image shape
+        mask: boolean array marking pixels that received a value
+    """
+    ir_w, ir_h = ir_size
+    rgb_w, rgb_h = rgb_size
+    shape = tuple(shape) if shape is not None else (rgb_h, rgb_w)
+    warped_ir = np.zeros(shape, dtype=ir_img.dtype)
+    mask = np.zeros(shape, dtype=bool)
+    for entry in mapping:
+        _, _, _, ir_x, ir_y, rgb_x, rgb_y = map(int, entry)
+        if 0 <= rgb_x < rgb_w and 0 <= rgb_y < rgb_h and 0 <= ir_x < ir_w and 0 <= ir_y < ir_h:
+            warped_ir[rgb_y, rgb_x] = ir_img[ir_y, ir_x]
+            mask[rgb_y, rgb_x] = True
+    return warped_ir, mask
+
+
+def fill_holes(warped, mask, indices=None):
+    """
+    Fills any gaps in the warped image using nearest-neighbor inpainting.
+
+    With a preallocated int32 `indices` array of shape (2, H, W) for the
+    distance transform, warped is filled in place.
+    """
+    if np.all(mask):
+        return warped
+    from scipy.ndimage import distance_transform_edt
+
+    if indices is not None:
+        distance_transform_edt(~mask, return_distances=False, return_indices=True, indices=indices)
+        warped[~mask] = warped[indices[0][~mask], indices[1][~mask]]
+        return warped
+    idx = distance_transform_edt(~mask, return_distances=False, return_indices=True)
+    filled = warped.copy()
+    filled[~mask] = warped[idx[0][~mask], idx[1][~mask]]
+    return filled
+
+
+def resolve_backend(backend="auto"):
+    """
+    Picks the kernel backend: "numpy", or "numba" when it is installed.
+
+    "auto" falls back to NumPy without Numba; asking for "numba" explicitly
+    raises ImportError if it is missing.
+    """
+    if backend not in ("auto", "numpy", "numba"):
+        raise ValueError(f"unknown backend '{backend}'")
+    has_numba = importlib.util.find_spec("numba") is not None
+    if backend == "numba" and not has_numba:
+        raise ImportError("the numba backend requires the numba package")
+    return "numba" if backend != "numpy" and has_numba else "numpy"
+
+
+def _kernels(backend):
+    """Returns the interpolation, dense projection and splat functions of a backend."""
+    if resolve_backend(backend) == "numba":
+        from . import jit
+
+        return jit.edge_aware_interpolation, jit.dense_mapping, jit.warp_ir_to_rgb
+    return edge_aware_interpolation, dense_mapping, warp_ir_to_rgb
+
+
+def interpolate_depth(depth, sparse=False, spatial_sigma=1.0, depth_sigma=0.05, backend="auto",
+                      outliers="histogram", dtype=np.float64, bounds=None):
+    """
+    Rejects depth outliers and interpolates the depth map.
+
+    Outlier bounds come from a fixed-bin histogram ("histogram") or from the
+    exact np.percentile reference ("percentile"); precomputed (z_min, z_max)
+    bounds replace both, e.g. to filter a crop like its full frame. In
+    sparse mode only valid pixels are smoothed and every other pixel is NaN;
+    otherwise holes are filled and the whole grid is defined.
+
+    Returns:
+        np.ndarray of shape (H, W) and the given dtype, depth in mm
+    """
+    if outliers not in ("histogram", "percentile"):
+        raise ValueError(f"unknown outlier filter '{outliers}'")
+    z_map = depth.astype(dtype)
+    if bounds is not None or outliers == "histogram":
+        z_map = reject_outliers(z_map, bounds=bounds)
+    else:
+        z_map = filter_outliers(z_map)
+    if sparse:
+        index = valid_pixel_index(z_map)
+        return scatter(index, interpolate_sparse(z_map, index, spatial_sigma, depth_sigma), z_map.shape)
+    interpolate = _kernels(backend)[0]
+    return fill_nearest(interpolate(z_map, spatial_sigma=spatial_sigma, depth_sigma=depth_sigma))
+
+
+def map_depth(z_filled, sparse=False, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+              ir_size=IR_SIZE, rgb_size=RGB_SIZE, ir_inverse=None, rgb_inverse=None, backend="auto"):
+    """
+    Maps depth pixels to IR and RGB coordinates.
+
+    In sparse mode only pixels with a finite, non-zero depth are mapped.
+    Projection runs in float32 when z_filled is float32; the per-pixel NumPy
+    reference is then replaced by the vectorized projection.
+
+    Returns:
+        np.ndarray of (row, col, depth_mm, IR_x, IR_y, RGB_x, RGB_y) rows
+    """
+    single = z_filled.dtype == np.float32
+    if sparse or (single and resolve_backend(backend) == "numpy"):
+        index = valid_pixel_index(z_filled) if sparse else np.arange(z_filled.size)
+        rows, cols = np.unravel_index(index, z_filled.shape)
+        rows, cols = rows + 1, cols + 1
+        depth = z_filled.ravel()[index]
+        d_cm = -depth / 10.0
+        ir_xy = project_points(ir_coeffs, d_cm, rows, cols, *ir_size, inverse=ir_inverse, dtype=depth.dtype)
+        rgb_xy = project_points(rgb_coeffs, d_cm, rows, cols, *rgb_size, inverse=rgb_inverse, dtype=depth.dtype)
+        return np.column_stack([rows, cols, depth, ir_xy, rgb_xy])
+    if ir_inverse is not None and rgb_inverse is not None:
+        return inverse_mapping(z_filled, ir_inverse, rgb_inverse, ir_size, rgb_size, ir_coeffs, rgb_coeffs)
+    return _kernels(backend)[1](z_filled, ir_coeffs, rgb_coeffs, ir_size, rgb_size)
+
+
+def warp_ir(mapping, ir_img, ir_size=IR_SIZE, rgb_size=RGB_SIZE, backend="auto", shape=None):
+    """
+    Splats IR into the RGB frame and fills the holes.
+
+    shape is the (rows, cols) of the RGB image (see warp_ir_to_rgb).
+
+    Returns:
+        warped_ir, mask of pixels that received a value before hole filling
+    """
+    warped_ir, mask = _kernels(backend)[2](mapping, ir_img, ir_size, rgb_size, shape)
+    return fill_holes(warped_ir, mask), mask
+
+
+def align_frame(frame, sparse=False, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+                ir_size=IR_SIZE, rgb_size=RGB_SIZE, spatial_sigma=1.0, depth_sigma=0.05,
+                ir_inverse=None, rgb_inverse=None, backend="auto", outliers="histogram", dtype=np.float64):
+    """
+    Aligns the IR image of a frame to its RGB image using the ToF depth.
+
+    With sparse=True only valid depth pixels are interpolated and projected;
+    otherwise the full depth grid is filled and every pixel is projected.
+    When both inverse models are given, projection evaluates them directly
+    instead of inverting H(d). The backend selects NumPy or Numba kernels for
+    interpolation, dense projection and the splat (see resolve_backend).
+    dtype=np.float32 runs the depth, interpolation and projection stages in
+    single precision (see compare_precision).
+
+    Returns:
+        Alignment
+    """
+    z_filled = interpolate_depth(frame.depth, sparse, spatial_sigma, depth_sigma, backend, outliers, dtype)
+    mapping = map_depth(z_filled, sparse, ir_coeffs, rgb_coeffs, ir_size, rgb_size,
+                        ir_inverse, rgb_inverse, backend)
+    warped_ir, mask = warp_ir(mapping, frame.ir, ir_size, rgb_size, backend, frame.rgb.shape[:2])
+    valid_ratio = len(mapping) / z_filled.size
+    return Alignment(z_filled, mapping, warped_ir, mask, valid_ratio)
+
+
+def align_stream(frames, ir_model=IR_COEFFS, rgb_model=RGB_COEFFS, temporal=None, **kwargs):
+    """
+    Aligns a sequence of frames, e.g. from a FrameLoader.
+
+    The models may be coefficient dicts or OnlineCalibration instances; the
+    latter are read again for every frame, so recalibration updates take
+    effect on the next frame without restarting the stream. An optional
+    depth.TemporalFilter smooths the depth of each frame before alignment.
+
+    Yields:
+        Alignment per frame
+    """
+    for frame in frames:
+        if temporal is not None:
+            frame = frame._replace(depth=temporal.update(frame.depth))
+        yield align_frame(frame, ir_coeffs=current_coeffs(ir_model),
+                          rgb_coeffs=current_coeffs(rgb_model), **kwargs)
+
+
+def compare_backends(frame, **kwargs):
+    """
+    Runs the NumPy and Numba backends on one frame and reports their differences.
+
+    Returns:
+        dict with the max absolute depth difference, the max coordinate
+        difference in pixels and the fraction of warped IR pixels that differ
+    """
+    reference = align_frame(frame, backend="numpy", **kwargs)
+    compiled = align_frame(frame, backend="numba", **kwargs)
+    return {
+        "depth": float(np.nanmax(np.abs(reference.z_filled - compiled.z_filled))),
+        "coordinates": float(np.abs(reference.mapping[:, 3:] - compiled.mapping[:, 3:]).max()),
+        "warped_ir": float(np.mean(reference.warped_ir != compiled.warped_ir)),
+    }
+
+
+def compare_precision(frame, sparse=False, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+                      spatial_sigma=1.0, depth_sigma=0.05, ir_inverse=None, rgb_inverse=None, backend="auto"):
+    """
+    Measures how far the float32 path drifts from float64 on one frame.
+
+    Depth is interpolated in both precisions, and every pixel with a valid
+    depth in both is projected in the matching precision. Unrounded
+    coordinates are compared, so drift shows up before it flips a rounded pixel.
+
+    Returns:
+        dict with the max absolute depth difference (mm), the max IR, RGB and
+        overall coordinate differences (px) and the fraction of pixels whose
+        rounded IR or RGB coordinates differ
+    """
+    z64 = interpolate_depth(frame.depth, sparse, spatial_sigma, depth_sigma, backend).ravel()
+    z32 = interpolate_depth(frame.depth, sparse, spatial_sigma, depth_sigma, backend, dtype=np.float32).ravel()
+    with np.errstate(invalid="ignore"):
+        index = np.flatnonzero(np.isfinite(z64) & np.isfinite(z32) & (z64 != 0) & (z32 != 0))
+    rows, cols = np.unravel_index(index, frame.depth.shape)
+    rows, cols = rows + 1, cols + 1
+
+    report = {"depth": float(np.abs(z32[index] - z64[index]).max(initial=0))}
+    mismatch = np.zeros(len(index), dtype=bool)
+    for name, coeffs, inverse in (("ir", ir_coeffs, ir_inverse), ("rgb", rgb_coeffs, rgb_inverse)):
+        xy64 = project_coordinates(coeffs, -z64[index] / 10.0, rows, cols, inverse)
+        xy32 = project_coordinates(coeffs, -z32[index] / 10.0, rows, cols, inverse, np.float32)
+        report[name] = float(np.abs(xy32 - xy64).max(initial=0))
+        mismatch |= (np.round(xy32) != np.round(xy64)).any(axis=1)
+    report["coordinates"] = max(report["ir"], report["rgb"])
+    report["rounded_mismatch"] = float(mismatch.mean()) if len(index) else 0.0
+    return report
+
+
+def save_text_outputs(depth, alignment, output_dir="."):
+    """Writes raw depth, interpolated depth and the pixel mapping as text tables."""
+    np.savetxt(os.path.join(output_dir, RAW_DEPTH_TXT), depth_table(depth),
+               fmt="%d %d %.6f", header="row col z", comments='')
+    np.savetxt(os.path.join(output_dir, INTERP_DEPTH_TXT), depth_table(alignment.z_filled),
+               fmt="%d %d %.6f", header="row col z", comments='')
+    np.savetxt(os.path.join(output_dir, MAPPING_TXT), alignment.mapping, fmt="%d %d %.2f %d %d %d %d",
+               header="row col depth_mm IR_x IR_y RGB_x RGB_y", comments='')
+
+
+def export_outputs(output_dir, depth, alignment, rgb=None, save_text=True, png=False, figure=False, show=False):
+    """
+    Writes the results of one frame.
+
+    Text tables are written when save_text is set and the warped IR PNG when
+    png is set. The cropped side-by-side figure (which needs the RGB image)
+    is rendered only when figure or show is requested, so headless runs never
+    import matplotlib.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if save_text:
+        save_text_outputs(depth, alignment, output_dir)
+    if png:
+        from PIL import Image
+
+        Image.fromarray(alignment.warped_ir).save(os.path.join(output_dir, WARPED_IR_PNG))
+
+    if figure or show:
+        from .plotting import side_by_side
+
+        side_by_side(alignment.warped_ir[CROP], rgb[CROP],
+                     os.path.join(output_dir, SIDE_BY_SIDE_PNG) if figure else None, show)
+
+
+def run(folder=".", output_dir=".", sparse=False, save_text=True, png=False, figure=False, show=False,
+        names=(PLY_NAME, IR_NAME, RGB_NAME), ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+        ir_inverse=None, rgb_inverse=None, backend="auto", fused=None, dtype=np.float64):
+    """
+    Loads a capture folder, aligns it and writes the results (see export_outputs).
+
+    With fused set to "nearest" or "bilinear", IR and RGB are instead gathered
+    into the ToF grid (see register.register_to_tof) and the fused frame is
+    saved as a structured .npy array.
+    """
+    frame = load_frame(folder, *TOF_SIZE, names)
+    if fused:
+        from .register import register_to_tof
+
+        result = register_to_tof(frame, fused == "bilinear", sparse, ir_coeffs, rgb_coeffs,
+                                 ir_inverse=ir_inverse, rgb_inverse=rgb_inverse, backend=backend, dtype=dtype)
+        os.makedirs(output_dir, exist_ok=True)
+        np.save(os.path.join(output_dir, FUSED_NPY), result)
+        print(f"Valid fused pixels: {result['valid'].mean():.1%}")
+        return result
+    alignment = align_frame(frame, sparse=sparse, ir_coeffs=ir_coeffs, rgb_coeffs=rgb_coeffs,
+                            ir_inverse=ir_inverse, rgb_inverse=rgb_inverse, backend=backend, dtype=dtype)
+    if sparse:
+        print(f"Valid depth pixels: {alignment.valid_ratio:.1%}")
+    export_outputs(output_dir, frame.depth, alignment, frame.rgb, save_text, png, figure, show)
+    return alignment
+
+
+def run_sequence(folders, sequence_path, chunk_frames=CHUNK_FRAMES, store_rgb=True, prefetch=2,
+                 names=(PLY_NAME, IR_NAME, RGB_NAME), ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS, **kwargs):
+    """
+    Aligns capture folders in order and appends the results to a sequence.
+
+    Frames are prefetched with a FrameLoader, aligned by one align_stream
+    over the whole loader and written to a chunked, memory-mapped
+    SequenceWriter; an existing sequence is continued. The coefficients may
+    be OnlineCalibration instances, and other keyword arguments (e.g.
+    temporal) go to align_stream.
+
+    Returns:
+        number of frames in the sequence
+    """
+    folders = list(folders)
+    # One copy of the frames feeds the stream, the other supplies their RGB images
+    frames, stream = itertools.tee(FrameLoader(folders, prefetch, *TOF_SIZE, names))
+    alignments = align_stream(stream, ir_model=ir_coeffs, rgb_model=rgb_coeffs, **kwargs)
+    with SequenceWriter(sequence_path, chunk_frames) as writer:
+        for folder, frame, alignment in zip(folders, frames, alignments):
+            writer.append_alignment(alignment, frame.rgb if store_rgb else None, source=folder)
+        return len(writer)
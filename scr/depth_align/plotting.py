@@ -0,0 +1,100 @@
+"""
+Matplotlib figures for the pipeline, calibration and detection tools.
+
+matplotlib is imported only when one of these functions is called. Unless a
+window is requested, the non-interactive Agg backend is selected first so
+that headless runs never touch a GUI toolkit.
+"""
+import numpy as np
+
+from .homography import ELEMENTS
+
+
+def pyplot(show=False):
+    """Imports matplotlib.pyplot, selecting the Agg backend unless show is set."""
+    import matplotlib
+
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def _finish(plt, fig, save_path, show, dpi=300, **savefig_kwargs):
+    if save_path:
+        fig.savefig(save_path, dpi=dpi, **savefig_kwargs)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def side_by_side(ir_img, rgb_img, save_path=None, show=False):
+    """Displays aligned IR and RGB crops next to each other."""
+    plt = pyplot(show)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 6))
+    ax1.imshow(ir_img, cmap="gray")
+    ax1.set_title("IR aligned to RGB (cropped)")
+    ax1.axis("off")
+    ax2.imshow(rgb_img)
+    ax2.set_title("Original RGB (cropped)")
+    ax2.axis("off")
+    plt.tight_layout()
+    _finish(plt, fig, save_path, show, bbox_inches='tight')
+
+
+def homography_elements(depths, H_ir, H_rgb, save_path=None, show=False, ylabel="Value"):
+    """
+    Plots how each homography matrix element changes with depth.
+
+    Args:
+        depths: depths in cm
+        H_ir, H_rgb: arrays of shape (num_depths, 9) or (num_depths, 3, 3)
+    """
+    plt = pyplot(show)
+    x = np.asarray(depths)
+    H_ir = np.asarray(H_ir).reshape(len(x), 9)
+    H_rgb = np.asarray(H_rgb).reshape(len(x), 9)
+
+    fig, axs = plt.subplots(3, 3, figsize=(14, 10))
+    axs = axs.ravel()
+
+    for i in range(9):
+        ax = axs[i]
+        y_ir = H_ir[:, i]
+        y_rgb = H_rgb[:, i]
+
+        # Plot points for IR and RGB homographies
+        ax.plot(x, y_ir, 'o', label='IR points', color='green')
+        ax.plot(x, y_rgb, 's', label='RGB points', color='red')
+
+        # Plot dashed lines connecting start and end points
+        ax.plot([x[0], x[-1]], [y_ir[0], y_ir[-1]], '--', label='IR line', color='lime')
+        ax.plot([x[0], x[-1]], [y_rgb[0], y_rgb[-1]], '--', label='RGB line', color='orange')
+
+        ax.set_title(ELEMENTS[i])
+        ax.set_xlabel("Depth (cm)")
+        ax.set_ylabel(ylabel)
+        ax.grid(True)
+        ax.legend(fontsize=7)
+
+    plt.suptitle("Homography Matrix Elements vs Depth", fontsize=16)
+    plt.tight_layout(rect=[0, 0, 1, 0.97])
+    _finish(plt, fig, save_path, show)
+
+
+def images(panels, save_path=None, show=False, figsize=None):
+    """
+    Displays one or more (title, RGB image) panels in a row.
+
+    Panels whose image is None are left empty.
+    """
+    plt = pyplot(show)
+    fig, axs = plt.subplots(1, len(panels), figsize=figsize or (7 * len(panels), 6), squeeze=False)
+    for ax, (title, img) in zip(axs[0], panels):
+        if img is not None:
+            ax.imshow(img)
+            ax.set_title(title)
+        ax.axis("off")
+    plt.tight_layout()
+    _finish(plt, fig, save_path, show)
@@ -0,0 +1,101 @@
+"""
+Registration of IR and RGB into the ToF grid by gathering.
+
+The scatter pipeline splats IR into the RGB frame, where several ToF pixels
+can land on one RGB pixel and others on none, so collisions and hole filling
+have to be handled. Here every ToF pixel instead looks up the IR and RGB
+values at its own projected coordinates. Each output pixel is written exactly
+once, and the result is a fused RGB-D-IR frame on the 640x480 depth grid.
+"""
+import numpy as np
+
+from .homography import IR_COEFFS, RGB_COEFFS
+from .pipeline import interpolate_depth
+from .sparse import project_coordinates, valid_pixel_index
+
+
+def fused_dtype(ir_dtype, rgb_dtype, rgb_channels=3):
+    """
+    Structured dtype of a fused frame.
+
+    Fields: depth (float32, mm), ir, rgb (rgb_channels values) and valid
+    (finite, non-zero depth and both projections inside their images).
+    """
+    return np.dtype([("depth", np.float32), ("ir", ir_dtype), ("rgb", rgb_dtype, (rgb_channels,)),
+                     ("valid", np.bool_)])
+
+
+def sample(image, xy, bilinear=False):
+    """
+    Reads image values at (x, y) pixel coordinates.
+
+    Coordinates outside the image are clamped to its border; callers mark
+    them invalid separately.
+
+    Returns:
+        np.ndarray of shape (N,) + image.shape[2:]; float32 with bilinear
+        sampling, the image dtype otherwise
+    """
+    h, w = image.shape[:2]
+    x, y = xy[:, 0], xy[:, 1]
+    if not bilinear:
+        xi = np.clip(np.rint(x), 0, w - 1).astype(np.intp)
+        yi = np.clip(np.rint(y), 0, h - 1).astype(np.intp)
+        return image[yi, xi]
+
+    x = np.clip(x, 0, w - 1)
+    y = np.clip(y, 0, h - 1)
+    x0 = np.minimum(np.floor(x).astype(np.intp), w - 2)
+    y0 = np.minimum(np.floor(y).astype(np.intp), h - 2)
+    fx = (x - x0).astype(np.float32)
+    fy = (y - y0).astype(np.float32)
+    if image.ndim == 3:
+        fx, fy = fx[:, None], fy[:, None]
+    top = image[y0, x0] * (1 - fx) + image[y0, x0 + 1] * fx
+    bottom = image[y0 + 1, x0] * (1 - fx) + image[y0 + 1, x0 + 1] * fx
+    return (top * (1 - fy) + bottom * fy).astype(np.float32)
+
+
+def _inside(xy, shape):
+    h, w = shape[:2]
+    # The scatter path clamps these to the border instead; here they are flagged
+    x, y = np.rint(xy[:, 0]), np.rint(xy[:, 1])
+    return (x >= 0) & (x <= w - 1) & (y >= 0) & (y <= h - 1)
+
+
+def register_to_tof(frame, bilinear=False, sparse=False, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+                    spatial_sigma=1.0, depth_sigma=0.05, ir_inverse=None, rgb_inverse=None, backend="auto",
+                    dtype=np.float64):
+    """
+    Gathers IR and RGB values into the ToF grid of a frame.
+
+    Depth is interpolated as in align_frame. Every ToF pixel with a finite,
+    non-zero depth is projected into IR and RGB, and the values at those
+    coordinates are read with nearest-pixel or bilinear sampling; a pixel is
+    valid when both coordinates fall inside the actual image shapes. No
+    scatter, collision handling or hole filling is needed.
+
+    Returns:
+        np.ndarray of shape (H, W) with dtype fused_dtype(...)
+    """
+    z_filled = interpolate_depth(frame.depth, sparse, spatial_sigma, depth_sigma, backend, dtype=dtype)
+    height, width = z_filled.shape
+    ir_img, rgb_img = frame.ir, frame.rgb
+    rgb_channels = rgb_img.shape[2] if rgb_img.ndim == 3 else 1
+    value_dtype = np.float32 if bilinear else None
+    fused = np.zeros((height, width), dtype=fused_dtype(value_dtype or ir_img.dtype,
+                                                        value_dtype or rgb_img.dtype, rgb_channels))
+    flat = fused.ravel()
+    flat["depth"] = z_filled.ravel()
+
+    index = valid_pixel_index(z_filled)
+    rows, cols = np.divmod(index, width)
+    rows, cols = rows + 1, cols + 1
+    d_cm = -z_filled.ravel()[index] / 10.0
+    ir_xy = project_coordinates(ir_coeffs, d_cm, rows, cols, ir_inverse, dtype)
+    rgb_xy = project_coordinates(rgb_coeffs, d_cm, rows, cols, rgb_inverse, dtype)
+
+    flat["ir"][index] = sample(ir_img, ir_xy, bilinear)
+    flat["rgb"][index] = sample(rgb_img, rgb_xy, bilinear).reshape(len(index), rgb_channels)
+    flat["valid"][index] = _inside(ir_xy, ir_img.shape) & _inside(rgb_xy, rgb_img.shape)
+    return fused
@@ -0,0 +1,148 @@
+"""
+Alignment restricted to a region of interest.
+
+A region is given either in ToF pixels or in RGB pixels. For an RGB region,
+the ToF pixels that can land in it are found from the homography model:
+since H(d) maps RGB pixels to ToF pixels, the region's corners are pushed
+through H(d) at depths spanning the scene's depth range and the bounding box
+of the results is taken. Interpolation, projection, warping and hole filling
+then run on that ToF window only, so apart from one histogram pass over the
+full depth map for the outlier bounds, the cost scales with the region area.
+
+Regions are half-open pixel boxes (x0, y0, x1, y1) with 0-based coordinates.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .depth import histogram_bounds
+from .homography import IR_COEFFS, RGB_COEFFS, homography_stack
+from .pipeline import IR_SIZE, RGB_SIZE, TOF_SIZE, fill_holes, interpolate_depth
+from .sparse import project_points, valid_pixel_index
+
+ROI = namedtuple("ROI", ["x0", "y0", "x1", "y1"])
+
+# Aligned outputs of a region. `mapping` rows follow pipeline.Alignment with
+# full-frame 1-based ToF row/col and full-frame IR/RGB coordinates; z_filled
+# covers tof_roi, warped_ir and mask cover rgb_roi.
+RoiAlignment = namedtuple("RoiAlignment", ["tof_roi", "rgb_roi", "z_filled", "mapping", "warped_ir",
+                                           "mask", "valid_ratio"])
+
+
+def clip_roi(roi, size):
+    """Clips a region to an image of size (width, height)."""
+    width, height = size
+    x0, y0, x1, y1 = roi
+    return ROI(max(int(x0), 0), max(int(y0), 0), min(int(x1), width), min(int(y1), height))
+
+
+def tof_roi_for_rgb(rgb_roi, z_range, coeffs=RGB_COEFFS, tof_size=TOF_SIZE, samples=8, margin=1):
+    """
+    Finds the ToF pixels that can project into an RGB region.
+
+    Args:
+        rgb_roi: region in RGB pixels
+        z_range: (z_min, z_max) depth bounds of the scene in mm, as in the depth map
+        coeffs: linear ToF-to-RGB depth model
+        samples: depths evaluated across the range
+        margin: pixels added around the bounding box
+
+    Returns:
+        ROI in ToF pixels
+    """
+    x0, y0, x1, y1 = rgb_roi
+    corners = np.array([[x0, y0, 1], [x1, y0, 1], [x0, y1, 1], [x1, y1, 1]], dtype=float).T
+    d_cm = -np.linspace(z_range[0], z_range[1], samples) / 10.0
+    mapped = homography_stack(coeffs, d_cm) @ corners  # (samples, 3, 4)
+    cols = mapped[:, 0] / mapped[:, 2] - 1  # 0-based ToF columns
+    rows = mapped[:, 1] / mapped[:, 2] - 1
+    return clip_roi((np.floor(cols.min()) - margin, np.floor(rows.min()) - margin,
+                     np.ceil(cols.max()) + 1 + margin, np.ceil(rows.max()) + 1 + margin), tof_size)
+
+
+def align_roi(frame, roi, space="rgb", z_range=None, sparse=False, ir_coeffs=IR_COEFFS, rgb_coeffs=RGB_COEFFS,
+              ir_size=IR_SIZE, rgb_size=RGB_SIZE, spatial_sigma=1.0, depth_sigma=0.05,
+              ir_inverse=None, rgb_inverse=None, backend="auto", window_size=3, dtype=np.float64):
+    """
+    Aligns IR to RGB inside a region of interest.
+
+    Outlier bounds are computed on the full depth map, and the depth window is
+    cropped with a halo of window_size // 2 pixels, so the interpolation
+    matches align_frame inside the region. Unlike align_frame, nearest-depth
+    hole filling only searches the window and its halo: a hole with no valid
+    depth in that area nearby may take a different value than in the full frame.
+
+    Args:
+        roi: (x0, y0, x1, y1) region
+        space: "rgb" or "tof", the coordinates of roi
+        z_range: depth bounds (mm) used to locate an RGB region in the ToF
+            frame; defaults to the frame's 1st/99th depth percentiles
+        dtype: precision of interpolation and projection, as in align_frame
+
+    Returns:
+        RoiAlignment
+    """
+    if space not in ("rgb", "tof"):
+        raise ValueError(f"unknown ROI space '{space}'")
+    depth = frame.depth
+    tof_size = depth.shape[::-1]
+    bounds = histogram_bounds(depth)
+
+    if space == "rgb":
+        rgb_roi = clip_roi(roi, rgb_size)
+        if z_range is None:
+            z_range = bounds
+            if z_range is None:
+                raise ValueError("frame has no valid depth to locate the ROI")
+        tof_roi = tof_roi_for_rgb(rgb_roi, z_range, rgb_coeffs, tof_size)
+    else:
+        tof_roi = clip_roi(roi, tof_size)
+        rgb_roi = None
+    x0, y0, x1, y1 = tof_roi
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError(f"ROI {tuple(roi)} does not overlap the frame")
+
+    # Interpolate the window plus a halo, then drop the halo
+    halo = window_size // 2
+    hx0, hy0, hx1, hy1 = clip_roi((x0 - halo, y0 - halo, x1 + halo, y1 + halo), tof_size)
+    z_halo = interpolate_depth(depth[hy0:hy1, hx0:hx1], sparse, spatial_sigma, depth_sigma, backend,
+                               dtype=dtype, bounds=bounds)
+    z_filled = z_halo[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+
+    if sparse:
+        index = valid_pixel_index(z_filled)
+    else:
+        index = np.arange(z_filled.size)
+    rows, cols = np.unravel_index(index, z_filled.shape)
+    rows, cols = rows + y0 + 1, cols + x0 + 1
+    z = z_filled.ravel()[index]
+    d_cm = -z / 10.0
+    ir_xy = project_points(ir_coeffs, d_cm, rows, cols, *ir_size, inverse=ir_inverse, dtype=dtype)
+    rgb_xy = project_points(rgb_coeffs, d_cm, rows, cols, *rgb_size, inverse=rgb_inverse, dtype=dtype)
+    mapping = np.column_stack([rows, cols, z, ir_xy, rgb_xy])
+
+    if rgb_roi is None:
+        if len(rgb_xy):
+            rgb_roi = ROI(int(rgb_xy[:, 0].min()), int(rgb_xy[:, 1].min()),
+                          int(rgb_xy[:, 0].max()) + 1, int(rgb_xy[:, 1].max()) + 1)
+        else:
+            rgb_roi = ROI(0, 0, 0, 0)
+
+    warped_ir, mask = _splat_roi(ir_xy, rgb_xy, frame.ir, rgb_roi)
+    if mask.any():
+        warped_ir = fill_holes(warped_ir, mask)
+    return RoiAlignment(tof_roi, rgb_roi, z_filled, mapping, warped_ir, mask, len(mapping) / z_filled.size)
+
+
+def _splat_roi(ir_xy, rgb_xy, ir_img, rgb_roi):
+    """Writes IR values into the RGB region; later points win collisions, as in the full splat."""
+    x0, y0, x1, y1 = rgb_roi
+    warped_ir = np.zeros((y1 - y0, x1 - x0), dtype=ir_img.dtype)
+    mask = np.zeros(warped_ir.shape, dtype=bool)
+    ir_h, ir_w = ir_img.shape[:2]
+    inside = ((rgb_xy[:, 0] >= x0) & (rgb_xy[:, 0] < x1) & (rgb_xy[:, 1] >= y0) & (rgb_xy[:, 1] < y1)
+              & (ir_xy[:, 0] < ir_w) & (ir_xy[:, 1] < ir_h))
+    ir_xy, rgb_xy = ir_xy[inside], rgb_xy[inside]
+    warped_ir[rgb_xy[:, 1] - y0, rgb_xy[:, 0] - x0] = ir_img[ir_xy[:, 1], ir_xy[:, 0]]
+    mask[rgb_xy[:, 1] - y0, rgb_xy[:, 0] - x0] = True
+    return warped_ir, mask
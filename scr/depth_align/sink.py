@@ -0,0 +1,238 @@
+"""
+Chunked, memory-mapped storage for long aligned sequences.
+
+A sequence is a folder holding:
+
+    layout.json            channel shapes and dtypes, frames per chunk
+    frames.tsv             frame index, one appended line per frame
+    <channel>_<chunk>.npy  preallocated (chunk_frames, *shape) arrays
+
+Frames are copied straight into memory-mapped .npy chunks, so appending a
+frame costs a memcpy per channel instead of PNG encoding or figure rendering.
+Any tool can read the chunks with np.load(..., mmap_mode="r").
+Slots past the last indexed frame of a chunk are unused. PNG and figure
+output is a separate export step (export_png).
+"""
+import json
+import os
+
+import numpy as np
+
+LAYOUT_NAME = "layout.json"
+INDEX_NAME = "frames.tsv"
+INDEX_HEADER = "frame\tchunk\tslot\tvalid_ratio\tsource\n"
+
+# Frames per chunk file; at full resolution one IR/RGB/depth frame is ~4.4 MB
+CHUNK_FRAMES = 64
+
+
+def alignment_channels(alignment, rgb=None):
+    """
+    Selects the arrays stored per frame.
+
+    Returns:
+        dict with the warped IR ('ir'), the mask of directly mapped RGB pixels
+        ('mask'), the interpolated depth ('depth', float32) and the RGB image
+        ('rgb') when given
+    """
+    channels = {
+        "ir": alignment.warped_ir,
+        "mask": alignment.mask,
+        "depth": alignment.z_filled.astype(np.float32, copy=False),
+    }
+    if rgb is not None:
+        channels["rgb"] = rgb
+    return channels
+
+
+def _chunk_path(path, name, chunk):
+    return os.path.join(path, f"{name}_{chunk:05d}.npy")
+
+
+class SequenceWriter:
+    """
+    Appends frames to a chunked sequence folder.
+
+    Channel shapes and dtypes are fixed by the first frame; frames that do
+    not match them are rejected. An existing
+    sequence is continued: new frames are appended after those in its index.
+    Use it as a context manager, or call close() to flush the open chunk.
+    """
+
+    def __init__(self, path, chunk_frames=CHUNK_FRAMES):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.channels = None
+        self._chunks = {}
+        self._chunk = -1
+        os.makedirs(path, exist_ok=True)
+
+        layout_path = os.path.join(path, LAYOUT_NAME)
+        index_path = os.path.join(path, INDEX_NAME)
+        self.count = 0
+        if os.path.exists(layout_path):
+            with open(layout_path, "r") as f:
+                layout = json.load(f)
+            self.chunk_frames = layout["chunk_frames"]
+            self.channels = {name: (tuple(spec["shape"]), np.dtype(spec["dtype"]))
+                             for name, spec in layout["channels"].items()}
+            self.count = len(read_index(path))
+        if not os.path.exists(index_path):
+            with open(index_path, "w") as f:
+                f.write(INDEX_HEADER)
+        self._index = open(index_path, "a")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _write_layout(self):
+        layout = {
+            "chunk_frames": self.chunk_frames,
+            "channels": {name: {"shape": list(shape), "dtype": dtype.str}
+                         for name, (shape, dtype) in self.channels.items()},
+        }
+        with open(os.path.join(self.path, LAYOUT_NAME), "w") as f:
+            json.dump(layout, f, indent=2)
+
+    def _open_chunk(self, chunk):
+        self._flush_chunks()
+        for name, (shape, dtype) in self.channels.items():
+            file_path = _chunk_path(self.path, name, chunk)
+            if os.path.exists(file_path):
+                self._chunks[name] = np.load(file_path, mmap_mode="r+")
+            else:
+                self._chunks[name] = np.lib.format.open_memmap(
+                    file_path, mode="w+", dtype=dtype, shape=(self.chunk_frames,) + shape)
+        self._chunk = chunk
+
+    def _flush_chunks(self):
+        for array in self._chunks.values():
+            array.flush()
+        self._chunks = {}
+
+    def append(self, channels, source="", valid_ratio=float("nan")):
+        """
+        Appends one frame.
+
+        Args:
+            channels: dict of channel name to array, e.g. from alignment_channels
+            source: label stored in the index, e.g. the capture folder
+            valid_ratio: fraction of mapped depth pixels, stored in the index
+
+        Returns:
+            index of the new frame
+        """
+        if self.channels is None:
+            self.channels = {name: (np.shape(a), np.asarray(a).dtype) for name, a in channels.items()}
+            self._write_layout()
+        if set(channels) != set(self.channels):
+            raise ValueError(f"frame channels {sorted(channels)} do not match {sorted(self.channels)}")
+
+        chunk, slot = divmod(self.count, self.chunk_frames)
+        if chunk != self._chunk:
+            self._open_chunk(chunk)
+        for name, array in channels.items():
+            shape, dtype = self.channels[name]
+            if np.shape(array) != shape:
+                raise ValueError(f"channel '{name}' has shape {np.shape(array)}, expected {shape}")
+            if np.asarray(array).dtype != dtype:
+                raise ValueError(f"channel '{name}' has dtype {np.asarray(array).dtype}, expected {dtype}")
+            self._chunks[name][slot] = array
+
+        self._index.write(f"{self.count}\t{chunk}\t{slot}\t{valid_ratio:.6f}\t{source}\n")
+        self._index.flush()
+        self.count += 1
+        return self.count - 1
+
+    def append_alignment(self, alignment, rgb=None, source=""):
+        """Appends the channels of an Alignment (see alignment_channels)."""
+        return self.append(alignment_channels(alignment, rgb), source, alignment.valid_ratio)
+
+    def close(self):
+        self._flush_chunks()
+        self._chunk = -1
+        if not self._index.closed:
+            self._index.close()
+
+
+def read_index(path):
+    """
+    Reads the frame index of a sequence.
+
+    Returns:
+        list of (chunk, slot, valid_ratio, source) tuples in frame order
+    """
+    entries = []
+    with open(os.path.join(path, INDEX_NAME), "r") as f:
+        next(f, None)
+        for line in f:
+            fields = line.rstrip("\n").split("\t", 4)
+            if len(fields) == 5:
+                entries.append((int(fields[1]), int(fields[2]), float(fields[3]), fields[4]))
+    return entries
+
+
+class SequenceReader:
+    """
+    Random access to the frames of a sequence folder through read-only memory maps.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, LAYOUT_NAME), "r") as f:
+            layout = json.load(f)
+        self.chunk_frames = layout["chunk_frames"]
+        self.channels = list(layout["channels"])
+        self.index = read_index(path)
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _chunk(self, name, chunk):
+        key = (name, chunk)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(_chunk_path(self.path, name, chunk), mmap_mode="r")
+        return self._chunks[key]
+
+    def __getitem__(self, i):
+        """Returns a dict of channel arrays (memory-mapped views) for frame i."""
+        chunk, slot, _, _ = self.index[i]
+        return {name: self._chunk(name, chunk)[slot] for name in self.channels}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def source(self, i):
+        return self.index[i][3]
+
+
+def export_png(path, output_dir, frames=None, figure=False, crop=(slice(None), slice(None))):
+    """
+    Renders stored frames as images: the warped IR as PNG and, with figure
+    set, the cropped side-by-side IR/RGB figure (needs the 'rgb' channel).
+
+    Args:
+        frames: frame indices to export (default: all)
+    """
+    from PIL import Image
+
+    reader = SequenceReader(path)
+    os.makedirs(output_dir, exist_ok=True)
+    if figure and "rgb" not in reader.channels:
+        raise ValueError("the side-by-side figure needs a sequence with an 'rgb' channel")
+    for i in range(len(reader)) if frames is None else frames:
+        frame = reader[i]
+        Image.fromarray(np.asarray(frame["ir"])).save(os.path.join(output_dir, f"warped_ir_{i:06d}.png"))
+        if figure:
+            from .plotting import side_by_side
+
+            side_by_side(frame["ir"][crop], frame["rgb"][crop],
+                         os.path.join(output_dir, f"side_by_side_{i:06d}.png"))
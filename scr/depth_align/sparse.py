@@ -0,0 +1,96 @@
+"""
+Sparse depth-to-image projection over valid ToF pixels only.
+
+The dense pipeline interpolates and projects every pixel of the depth grid,
+including zero-depth pixels and those rejected by the outlier filter. Here the
+valid pixels are gathered into a compact index first; interpolation and
+projection run on that index and results are scattered back to the grid last.
+"""
+import numpy as np
+
+from .homography import homography_stack
+from .inverse import inverse_covers, project_with_inverse
+
+
+def valid_pixel_index(z_map):
+    """Returns flat indices of pixels with a finite, non-zero depth."""
+    flat = z_map.ravel()
+    return np.flatnonzero(np.isfinite(flat) & (flat != 0))
+
+
+def interpolate_sparse(z_map, index, spatial_sigma=1.0, depth_sigma=0.1, window_size=3):
+    """
+    Edge-aware smoothing evaluated at the indexed pixels only.
+
+    Uses the same weights as edge_aware_interpolation for pixels with a valid
+    center value, gathering each window offset at once for all pixels. As
+    there, weights and sums are float64 and only the result takes z_map's dtype.
+
+    Returns:
+        np.ndarray of shape (len(index),)
+    """
+    half = window_size // 2
+    padded = np.pad(z_map, pad_width=half, mode='reflect')
+    rows, cols = np.unravel_index(index, z_map.shape)
+    center = z_map.ravel()[index].astype(np.float64)
+
+    weighted_sum = np.zeros(len(index))
+    weight_total = np.zeros(len(index))
+    for dy in range(-half, half + 1):
+        for dx in range(-half, half + 1):
+            patch = padded[rows + half + dy, cols + half + dx].astype(np.float64)
+            spatial = np.exp(-(dx**2 + dy**2) / (2 * spatial_sigma**2))
+            weights = spatial * np.exp(-((patch - center) ** 2) / (2 * depth_sigma**2))
+            weights[np.isnan(patch)] = 0
+            weighted_sum += np.where(weights > 0, patch, 0) * weights
+            weight_total += weights
+
+    values = np.where(weight_total > 0, weighted_sum / np.where(weight_total > 0, weight_total, 1), center)
+    return values.astype(z_map.dtype, copy=False)
+
+
+def project_coordinates(coeffs, d_cm, rows, cols, inverse=None, dtype=np.float64):
+    """
+    Maps ToF pixels (1-based rows/cols) into a target image through H(d)^-1.
+
+    When an inverse model is given, H(d)^-1 is evaluated directly from it
+    instead of solving a 3x3 system per pixel. Depths outside the model's
+    fitted range, such as the zero depth of unmeasured pixels, still go
+    through the exact inverse of coeffs. The arithmetic runs in dtype.
+
+    Returns:
+        np.ndarray of shape (N, 2), unrounded and unclipped (x, y)
+    """
+    d_cm = np.asarray(d_cm, dtype=dtype)
+    rows, cols = np.asarray(rows, dtype=dtype), np.asarray(cols, dtype=dtype)
+    if inverse is None:
+        return _solve_coordinates(coeffs, d_cm, rows, cols, dtype)
+    xy = np.stack(project_with_inverse(inverse, d_cm, rows, cols), axis=-1)
+    outside = ~inverse_covers(inverse, d_cm)
+    if outside.any():
+        xy[outside] = _solve_coordinates(coeffs, d_cm[outside], rows[outside], cols[outside], dtype)
+    return xy
+
+
+def _solve_coordinates(coeffs, d_cm, rows, cols, dtype):
+    pts = np.stack([cols, rows, np.ones(len(rows))], axis=-1).astype(dtype)
+    mapped = np.linalg.solve(homography_stack(coeffs, d_cm, dtype), pts[..., None])[..., 0]
+    return mapped[:, :2] / mapped[:, 2:3]
+
+
+def project_points(coeffs, d_cm, rows, cols, w, h, inverse=None, dtype=np.float64):
+    """
+    Maps ToF pixels (1-based rows/cols) to target pixels (see project_coordinates).
+
+    Returns:
+        np.ndarray of shape (N, 2), integer (x, y) clipped to the image
+    """
+    xy = np.round(project_coordinates(coeffs, d_cm, rows, cols, inverse, dtype))
+    return np.clip(xy, [0, 0], [w - 1, h - 1]).astype(int)
+
+
+def scatter(index, values, shape, fill=np.nan):
+    """Writes compact per-pixel values back into a full grid."""
+    out = np.full(int(np.prod(shape)), fill, dtype=np.result_type(values, fill))
+    out[index] = values
+    return out.reshape(shape)
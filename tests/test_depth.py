@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from depth_align.depth import TemporalFilter
+
+
+@pytest.mark.parametrize("mode", ["ema", "median"])
+def test_temporal_filter_expires_missing_pixels(mode):
+    temporal = TemporalFilter(size=3, mode=mode, alpha=0.5)
+    outputs = [float(temporal.update(np.array([[value]]))[0, 0]) for value in [1000, 1010, 1005, 0, 0, 0]]
+    # Short dropouts keep the previous depth, longer ones report the missing sample
+    assert outputs[3] != 0
+    assert outputs[5] == 0
+    assert float(temporal.update(np.array([[990.0]]))[0, 0]) == 990
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+from depth_align import pipeline
+from depth_align.calibration import DEPTHS
+from depth_align.cli import calibrate_main
+from depth_align.corners import CornerDataset
+from depth_align.inverse import fit_inverse_model, read_inverse_model
+from depth_align.loader import load_frame
+from depth_align.sparse import project_coordinates, project_points
+
+RES = os.path.join(os.path.dirname(__file__), os.pardir, "res")
+
+
+def test_inverse_models_match_exact_path():
+    frame = load_frame(os.path.join(RES, "teapot_images"))
+    ir_inverse = fit_inverse_model(pipeline.IR_COEFFS, 100, 250)
+    rgb_inverse = fit_inverse_model(pipeline.RGB_COEFFS, 100, 250)
+    alignment = pipeline.align_frame(frame, backend="numpy", ir_inverse=ir_inverse, rgb_inverse=rgb_inverse)
+
+    # Most dense pixels have zero depth, outside the fitted range
+    mapping = alignment.mapping
+    assert np.mean(mapping[:, 2] == 0) > 0.5
+    rows, cols, d_cm = mapping[:, 0], mapping[:, 1], -mapping[:, 2] / 10.0
+    for columns, coeffs, size in ((slice(3, 5), pipeline.IR_COEFFS, pipeline.IR_SIZE),
+                                  (slice(5, 7), pipeline.RGB_COEFFS, pipeline.RGB_SIZE)):
+        exact = project_points(coeffs, d_cm, rows, cols, *size)
+        differs = np.any(mapping[:, columns] != exact, axis=1)
+        assert differs.mean() < 1e-3
+        assert np.abs(mapping[:, columns] - exact).max() <= 1
+
+
+def test_fit_rgb_inverse_output_projects_tof_to_rgb(tmp_path):
+    corners_dir = os.path.join(RES, "long_distance_calibration", "extracted_corners")
+    dataset_path = str(tmp_path / "corners")
+    CornerDataset.from_text(corners_dir, DEPTHS).save(dataset_path)
+    inverse_path = str(tmp_path / "inverse.txt")
+    calibrate_main(["fit", "rgb", "100", "250", "--dataset", dataset_path, "-o", str(tmp_path / "model.txt"),
+                    "--inverse-output", inverse_path])
+
+    inverse = read_inverse_model(inverse_path)
+    assert inverse["range"] == (100.0, 250.0)
+    dataset = CornerDataset.load(dataset_path + ".npz")
+    for depth, tof in zip(*dataset.paired("tof", "rgb")[:2]):
+        d_cm = np.full(len(tof), depth)
+        rows, cols = tof[:, 1] + 1, tof[:, 0] + 1
+        modelled = project_coordinates(None, d_cm, rows, cols, inverse)
+        builtin = project_coordinates(pipeline.RGB_COEFFS, d_cm, rows, cols)
+        assert np.abs(modelled - builtin).max() < 50
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from depth_align.calibration import DEPTHS
+from depth_align.cli import calibrate_main
+from depth_align.corners import CornerDataset
+from depth_align.homography import RGB_COEFFS, read_linear_model
+from depth_align.online import OnlineCalibration, current_coeffs
+from depth_align.sparse import project_coordinates
+
+CORNERS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "res", "long_distance_calibration",
+                           "extracted_corners")
+
+
+def _max_rgb_difference(coeffs, dataset):
+    """Largest RGB coordinate difference to RGB_COEFFS over the ToF corners of every capture."""
+    worst = 0.0
+    for depth, tof in zip(*dataset.paired("tof", "rgb")[:2]):
+        d_cm = np.full(len(tof), depth)
+        rows, cols = tof[:, 1] + 1, tof[:, 0] + 1
+        fitted = project_coordinates(coeffs, d_cm, rows, cols)
+        builtin = project_coordinates(RGB_COEFFS, d_cm, rows, cols)
+        worst = max(worst, float(np.abs(fitted - builtin).max()))
+    return worst
+
+
+def test_update_rgb_matches_runtime_direction(tmp_path):
+    dataset_path = str(tmp_path / "corners")
+    CornerDataset.from_text(CORNERS_DIR, DEPTHS).save(dataset_path)
+    state, model_path = str(tmp_path / "state"), str(tmp_path / "model.txt")
+    argv = ["update", "rgb", state, "--dataset", dataset_path, "-o", model_path]
+    calibrate_main(argv)
+
+    dataset = CornerDataset.load(dataset_path + ".npz")
+    # The inverted (ToF to RGB) model would be off by hundreds of pixels
+    assert _max_rgb_difference(read_linear_model(model_path), dataset) < 50
+
+    # Replaying the dataset folds nothing new
+    calibrate_main(argv)
+    model = OnlineCalibration.load(state + ".npz")
+    assert len(model.folded) == len(DEPTHS)
+    assert _max_rgb_difference(current_coeffs(model), dataset) < 50
+
+
+def test_current_coeffs_without_model():
+    with pytest.raises(ValueError, match="no model yet"):
+        current_coeffs(OnlineCalibration())
+    assert current_coeffs(OnlineCalibration(initial=RGB_COEFFS)) == RGB_COEFFS
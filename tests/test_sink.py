@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from depth_align import pipeline
+from depth_align.sink import SequenceReader, SequenceWriter
+
+TEAPOT = os.path.join(os.path.dirname(__file__), os.pardir, "res", "teapot_images")
+
+
+def _channels(i):
+    return {
+        "ir": np.full((4, 5), i, dtype=np.uint8),
+        "depth": np.full((3, 2), -100.0 * i, dtype=np.float32),
+    }
+
+
+def test_write_and_read_back(tmp_path):
+    path = str(tmp_path / "seq")
+    with SequenceWriter(path, chunk_frames=2) as writer:
+        for i in range(3):
+            writer.append(_channels(i), source=f"frame{i}", valid_ratio=0.5)
+    # Reopening continues after the stored frames
+    with SequenceWriter(path) as writer:
+        writer.append(_channels(3), source="frame3")
+        assert len(writer) == 4
+
+    reader = SequenceReader(path)
+    assert len(reader) == 4
+    for i, frame in enumerate(reader):
+        np.testing.assert_array_equal(frame["ir"], _channels(i)["ir"])
+        np.testing.assert_array_equal(frame["depth"], _channels(i)["depth"])
+        assert reader.source(i) == f"frame{i}"
+
+
+def test_rejects_mismatched_dtype(tmp_path):
+    with SequenceWriter(str(tmp_path / "seq")) as writer:
+        writer.append(_channels(0))
+        channels = _channels(1)
+        channels["ir"] = channels["ir"].astype(np.uint16)
+        with pytest.raises(ValueError, match="dtype"):
+            writer.append(channels)
+
+
+def test_run_sequence(tmp_path):
+    path = str(tmp_path / "seq")
+    count = pipeline.run_sequence([TEAPOT, TEAPOT], path, chunk_frames=1, sparse=True, backend="numpy",
+                                  ir_coeffs=pipeline.IR_COEFFS, rgb_coeffs=pipeline.RGB_COEFFS)
+    assert count == 2
+
+    reader = SequenceReader(path)
+    assert sorted(reader.channels) == ["depth", "ir", "mask", "rgb"]
+    first, second = reader[0], reader[1]
+    assert first["ir"].shape == first["rgb"].shape[:2]
+    np.testing.assert_array_equal(first["ir"], second["ir"])
+    assert first["mask"].any()